@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks do classic-bot contra a réplica local (benchmarks/replica_site.py).
+Mede:
+  - startup do driver (create_chrome_driver) e RSS do navegador, perfis default e lean
+  - cmd_form ponta a ponta (home → CTA → passos 1..3)
+  - round trips WebDriver por passo do fluxo do FormPage
+  - cmd_scan: tempo/memória em função do tamanho do DOM (1k–50k elementos)
+Resultados em Documentos/classicbot/benchmarks/<ts>_<label>.json; compara com a última execução
+aprovada (ponteiro latest_bench.ptr) ou --baseline e sai com código 1 se houver regressão.
+
+Uso:
+  python benchmarks/bench.py --repeat 3
+  python benchmarks/bench.py --sizes 1000,5000 --threshold 0.10 --baseline caminho/para/base.json
+"""
+from __future__ import annotations
+import os
+import sys
+import json
+import time
+import tempfile
+import statistics
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Callable, List, Optional
+
+import click
+
+ROOT = Path(__file__).resolve().parent.parent
+for p in (ROOT / "src", ROOT):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+from benchmarks.replica_site import ReplicaSite
+from utils.paths import classicbot_dirs
+from utils.retention import write_pointer, resolve_pointer
+from utils.driver_factory import create_chrome_driver, browser_rss, LAUNCH_PROFILES
+from utils.wd_profiler import WebDriverProfiler
+
+# piso absoluto por tipo de métrica (abaixo disso a variação é ruído)
+_NOISE_FLOOR = {"_s": 0.05, "_mb": 1.0}
+
+def _median(fn: Callable[[], float], repeat: int) -> float:
+    return round(statistics.median(fn() for _ in range(repeat)), 4)
+
+def bench_driver_startup(repeat: int) -> Dict[str, float]:
+    """Startup e RSS do navegador ocioso (about:blank) para cada perfil de inicialização."""
+    metrics: Dict[str, float] = {}
+    for launch_profile in LAUNCH_PROFILES:
+        rss: List[float] = []
+
+        def once():
+            t0 = time.perf_counter()
+            driver = create_chrome_driver(headless=True, launch_profile=launch_profile)
+            dt = time.perf_counter() - t0
+            mem = browser_rss(driver)
+            if mem:
+                rss.append(mem["rss_bytes"] / 1e6)
+            driver.quit()
+            return dt
+        suffix = "" if launch_profile == "default" else f"_{launch_profile}"
+        metrics[f"driver_startup{suffix}_s"] = _median(once, repeat)
+        if rss:
+            metrics[f"browser_rss{suffix}_mb"] = round(statistics.median(rss), 1)
+    return metrics
+
+def bench_form_e2e(url: str, repeat: int) -> Dict[str, float]:
+    from commands.cmd_form import cmd_form
+
+    def once():
+        t0 = time.perf_counter()
+        rc = cmd_form.main(["--url", url, "--no-open"], standalone_mode=False)
+        if rc != 0:
+            raise click.ClickException("cmd_form falhou na réplica (veja o relatório em CLASSICBOT_HOME).")
+        return time.perf_counter() - t0
+    return {"form_e2e_s": _median(once, repeat)}
+
+def bench_form_roundtrips(url: str) -> Dict[str, float]:
+    """Executa o fluxo do FormPage com contagem de comandos por passo (sem startup do driver)."""
+    from commands.cmd_form import open_form_full
+    from pages.form_page import FormPage
+    from reporters.html_reporter import HTMLReporter
+
+    reporter = HTMLReporter(out_dir=Path(tempfile.mkdtemp(prefix="cb_bench_")))
+    driver = create_chrome_driver(headless=True)
+    try:
+        profiler = WebDriverProfiler(driver).attach()
+        page = FormPage(driver)
+        steps = [
+            ("home_cta", lambda: open_form_full(driver, url, reporter)),
+            ("form_ready", page.wait_form_ready),
+            ("step1_fill", lambda: page.fill_step1("Teste QA", "qa@example.com", "01/01/1990", "11999999999", "5000-7000")),
+            ("step1_advance", page.advance_from_step1),
+            ("step2_slider", lambda: page.set_slider_if_needed(200000)),
+            ("step2_advance", page.next_from_step2),
+            ("step3_accept", page.accept_declarations),
+            ("step3_ready", page.is_ready_to_finalize),
+        ]
+        # contagem por fatia de profiler.records: o reporter troca o step_var a cada add_step
+        counts: Dict[str, int] = {}
+        for name, fn in steps:
+            before = len(profiler.records)
+            fn()
+            counts[name] = len(profiler.records) - before
+        profiler.detach()
+    finally:
+        driver.quit()
+    metrics = {f"form_roundtrips.{k}": float(v) for k, v in counts.items()}
+    metrics["form_roundtrips.total"] = float(sum(counts.values()))
+    return metrics
+
+def bench_scan(url: str, sizes: List[int], repeat: int) -> Dict[str, float]:
+    from commands.cmd_scan import cmd_scan, scan_page, wait_ready
+
+    metrics: Dict[str, float] = {}
+    driver = create_chrome_driver(headless=True)
+    try:
+        driver.set_script_timeout(600)
+        for n in sizes:
+            page_url = f"{url}/scan/{n}"
+            driver.get(page_url)
+            wait_ready(driver)
+            times, peaks = [], []
+            for _ in range(repeat):
+                tracemalloc.start()
+                t0 = time.perf_counter()
+                elements, _frames = scan_page(driver)
+                times.append(time.perf_counter() - t0)
+                peaks.append(tracemalloc.get_traced_memory()[1] / 1e6)
+                tracemalloc.stop()
+            heap = driver.execute_script("return performance.memory ? performance.memory.usedJSHeapSize : 0;") or 0
+            metrics[f"scan.{n}.traverse_s"] = round(statistics.median(times), 4)
+            metrics[f"scan.{n}.py_peak_mb"] = round(max(peaks), 2)
+            metrics[f"scan.{n}.js_heap_mb"] = round(heap / 1e6, 2)
+            metrics[f"info.scan.{n}.elements"] = float(len(elements))
+    finally:
+        driver.quit()
+
+    for n in sizes:
+        def once(n=n):
+            t0 = time.perf_counter()
+            rc = cmd_scan.main(["--url", f"{url}/scan/{n}", "--no-open"], standalone_mode=False)
+            if rc != 0:
+                raise click.ClickException(f"cmd_scan falhou para {n} elementos.")
+            return time.perf_counter() - t0
+        metrics[f"scan.{n}.e2e_s"] = _median(once, 1)
+    return metrics
+
+def compare(current: Dict[str, float], baseline: Dict[str, float], threshold: float) -> List[str]:
+    """Lista as métricas (menor = melhor) que pioraram além do limite relativo e do piso de ruído."""
+    regressions = []
+    for key, new in sorted(current.items()):
+        old = baseline.get(key)
+        if key.startswith("info.") or old is None:
+            continue
+        floor = 0.0 if "roundtrips" in key else next((v for sfx, v in _NOISE_FLOOR.items() if key.endswith(sfx)), 0.0)
+        if new > old * (1 + threshold) and new - old > floor:
+            regressions.append(f"{key}: {old} → {new} (+{(new / old - 1) * 100 if old else float('inf'):.1f}%)")
+    return regressions
+
+@click.command(help="Benchmarks do classic-bot contra uma réplica local do site.")
+@click.option("--repeat", default=3, show_default=True, type=click.IntRange(min=1), help="Repetições (mediana).")
+@click.option("--sizes", default="1000,10000,50000", show_default=True, help="Tamanhos de DOM para o scan.")
+@click.option("--loading-delay", default=800, show_default=True, type=int, help="Atraso (ms) do #coverageLoading.")
+@click.option("--only", type=click.Choice(["startup", "form", "roundtrips", "scan"]), multiple=True,
+              help="Roda só os grupos indicados (padrão: todos).")
+@click.option("--label", default="local", show_default=True, help="Rótulo da execução (ex.: versão/commit).")
+@click.option("--baseline", type=click.Path(exists=True, dir_okay=False), default=None,
+              help="Arquivo de resultados para comparar (padrão: execução anterior).")
+@click.option("--threshold", default=0.15, show_default=True, type=float, help="Regressão relativa tolerada.")
+@click.option("--out-dir", type=click.Path(file_okay=False), default=None,
+              help="Pasta dos resultados (padrão: Documentos/classicbot/benchmarks).")
+def main(repeat, sizes, loading_delay, only, label, baseline, threshold, out_dir):
+    results_dir = Path(out_dir) if out_dir else classicbot_dirs()["base"] / "benchmarks"
+    results_dir.mkdir(parents=True, exist_ok=True)
+    base_file: Optional[Path] = Path(baseline) if baseline else resolve_pointer(results_dir, "latest_bench")
+
+    # relatórios/scans gerados pelos comandos vão para uma pasta descartável
+    os.environ["CLASSICBOT_HOME"] = tempfile.mkdtemp(prefix="cb_bench_home_")
+    groups = set(only) or {"startup", "form", "roundtrips", "scan"}
+    size_list = [int(x) for x in sizes.split(",") if x.strip()]
+
+    metrics: Dict[str, float] = {}
+    with ReplicaSite(loading_delay_ms=loading_delay) as site:
+        click.echo(f"Réplica em {site.url} (saídas em {os.environ['CLASSICBOT_HOME']})")
+        if "startup" in groups:
+            metrics.update(bench_driver_startup(repeat))
+        if "form" in groups:
+            metrics.update(bench_form_e2e(site.url, repeat))
+        if "roundtrips" in groups:
+            metrics.update(bench_form_roundtrips(site.url))
+        if "scan" in groups:
+            metrics.update(bench_scan(site.url, size_list, repeat))
+
+    payload: Dict[str, Any] = {
+        "meta": {"label": label, "at": datetime.now().isoformat(timespec="seconds"), "repeat": repeat,
+                 "loading_delay_ms": loading_delay, "python": sys.version.split()[0], "platform": sys.platform},
+        "metrics": metrics,
+    }
+    out = results_dir / f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{label}.json"
+    out.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    for key, value in sorted(metrics.items()):
+        click.echo(f"  {key:40} {value}")
+    click.echo(f"📊 Resultados: {out}")
+
+    if base_file is None:
+        write_pointer(results_dir, "latest_bench", out)
+        click.echo("Sem baseline para comparar (primeira execução).")
+        return
+    base_metrics = json.loads(base_file.read_text(encoding="utf-8")).get("metrics", {})
+    regressions = compare(metrics, base_metrics, threshold)
+    if regressions:
+        click.echo(f"❌ Regressões vs {base_file.name} (limite {threshold:.0%}):")
+        for r in regressions:
+            click.echo(f"  - {r}")
+        sys.exit(1)
+    # só execuções sem regressão viram a próxima baseline
+    write_pointer(results_dir, "latest_bench", out)
+    click.echo(f"✅ Sem regressões vs {base_file.name} (limite {threshold:.0%}).")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+Réplica local do masterclassic.com.br para benchmarks:
+- /                 home com o CTA "Simule Agora" → /formulario/
+- /formulario/      form#vidaSeguroForm com #step-1..3, #coverageLoading (atraso configurável),
+                    #coverageResults, #mainNavigationButtons e #btnFinalizarProposta
+- /scan/<n>         página sintética com n elementos inventariáveis (inclui shadow DOM e iframe same-origin)
+- /frame            conteúdo do iframe das páginas de scan
+"""
+from __future__ import annotations
+import threading
+from functools import lru_cache
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+HOME_HTML = """<!doctype html><html lang="pt-br"><meta charset="utf-8"><title>masterClassic (réplica)</title>
+<body><header><nav><a href="/">Início</a> <a href="/sobre/">Sobre</a></nav></header>
+<main><h1>Seguro de vida</h1><a class="cta" href="/formulario/">Simule Agora</a></main></body></html>"""
+
+FORM_HTML = """<!doctype html><html lang="pt-br"><meta charset="utf-8"><title>Formulário (réplica)</title>
+<style>.step{display:none}.step.active{display:block}#coverageLoading,#coverageResults,#mainNavigationButtons{display:none}</style>
+<body>
+<form id="vidaSeguroForm" onsubmit="return false">
+  <section id="step-1" class="step active">
+    <input id="contratanteNome" name="contratanteNome">
+    <input id="contratanteEmail" name="contratanteEmail" type="email">
+    <input id="dataNascimento" name="dataNascimento">
+    <input id="contratanteTelefone" name="contratanteTelefone">
+    <select id="rendaMensal" name="rendaMensal">
+      <option value="">Selecione</option><option value="0-3000">até 3.000</option><option value="3000-5000">3.000–5.000</option>
+      <option value="5000-7000">5.000–7.000</option><option value="7000-10000">7.000–10.000</option>
+      <option value="10000-15000">10.000–15.000</option><option value="15000+">15.000+</option>
+    </select>
+    <button type="button" id="btnNextStep1">Próximo</button>
+  </section>
+  <section id="step-2" class="step">
+    <div id="coverageLoading">Calculando coberturas…</div>
+    <div id="coverageResults"><input type="range" id="coberturaVidaSlider" min="10000" max="1000000" step="10000" value="100000"></div>
+  </section>
+  <section id="step-3" class="step">
+    <label><input type="checkbox" id="aceiteFinalTodasDeclaracoes"> Aceito</label>
+    <button type="button" id="btnFinalizarProposta" disabled>Pagar e Contratar</button>
+  </section>
+  <div id="mainNavigationButtons"><button type="button" id="btnPrev">Voltar</button><button type="button" id="btnNext">Próximo</button></div>
+</form>
+<script>
+  const DELAY = %(delay)d;
+  const $ = (id) => document.getElementById(id);
+  function show(step){ document.querySelectorAll('.step').forEach(s => s.classList.toggle('active', s.id === step)); }
+  $('btnNextStep1').addEventListener('click', () => {
+    show('step-2');
+    $('coverageLoading').style.display = 'block';
+    setTimeout(() => {
+      $('coverageLoading').style.display = 'none';
+      $('coverageResults').style.display = 'block';
+      $('mainNavigationButtons').style.display = 'block';
+    }, DELAY);
+  });
+  $('btnNext').addEventListener('click', () => show('step-3'));
+  $('btnPrev').addEventListener('click', () => show('step-2'));
+  $('aceiteFinalTodasDeclaracoes').addEventListener('change', (e) => { $('btnFinalizarProposta').disabled = !e.target.checked; });
+  $('btnFinalizarProposta').addEventListener('click', () => { location.href = '/obrigado/'; });
+</script></body></html>"""
+
+FRAME_HTML = """<!doctype html><meta charset="utf-8"><body>
+<input id="frameEmail" placeholder="email"><button data-testid="frame-send">Enviar</button></body>"""
+
+_ELEMENT_TEMPLATES = (
+    '<input id="in{i}" name="campo{i}" placeholder="Campo {i}">',
+    '<button class="btn btn-{m}" type="button">Botão {i}</button>',
+    '<a href="/pagina/{i}">Link {i}</a>',
+    '<label for="in{i}">Rótulo {i}</label>',
+    '<div role="button" data-testid="acao-{i}">Ação {i}</div>',
+    '<select name="sel{i}"><option>1</option></select>',
+    '<textarea aria-label="Texto {i}"></textarea>',
+)
+
+@lru_cache(maxsize=16)
+def scan_page_html(n: int) -> bytes:
+    """Página com n elementos que o scan inventaria, em seções aninhadas, + shadow DOM e iframe."""
+    parts = ["<!doctype html><html lang='pt-br'><meta charset='utf-8'><title>Scan sintético</title><body>"]
+    for i in range(n):
+        if i % 50 == 0:
+            parts.append("</div>" if i else "")
+            parts.append(f"<div class='secao s{i // 50}'>")
+        parts.append(_ELEMENT_TEMPLATES[i % len(_ELEMENT_TEMPLATES)].format(i=i, m=i % 10))
+    parts.append("</div>")
+    parts.append("""<cb-widget></cb-widget><iframe src="/frame" width="300" height="120"></iframe>
+<script>
+customElements.define('cb-widget', class extends HTMLElement {
+  connectedCallback(){ this.attachShadow({mode:'open'}).innerHTML = '<input id="shadowInput"><button>Shadow</button>'; }
+});
+</script></body></html>""")
+    return "".join(parts).encode("utf-8")
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):  # silencioso
+        pass
+
+    def _send(self, body: bytes, status: int = 200, ctype: str = "text/html; charset=utf-8"):
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/":
+            return self._send(HOME_HTML.encode("utf-8"))
+        if path.rstrip("/") == "/formulario":
+            return self._send((FORM_HTML % {"delay": self.server.loading_delay_ms}).encode("utf-8"))
+        if path == "/frame":
+            return self._send(FRAME_HTML.encode("utf-8"))
+        if path.startswith("/scan/"):
+            try:
+                n = int(path.rsplit("/", 1)[1])
+            except ValueError:
+                return self._send(b"n invalido", 400, "text/plain")
+            return self._send(scan_page_html(n))
+        if path == "/robots.txt":
+            return self._send(b"User-agent: *\n", ctype="text/plain")
+        return self._send(b"<!doctype html><p>ok</p>")
+
+class ReplicaSite:
+    """Servidor HTTP local em thread. Uso: with ReplicaSite(loading_delay_ms=800) as site: site.url"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, loading_delay_ms: int = 800):
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.server.daemon_threads = True
+        self.server.loading_delay_ms = int(loading_delay_ms)  # type: ignore[attr-defined]
+        self._thread = threading.Thread(target=self.server.serve_forever, name="replica-site", daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "ReplicaSite":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
@@ -2,19 +2,22 @@
 """
 Launcher da CLI do bot masterClassic
 - MENU interativo
-- Logs e relatórios em Documentos/classicbot/{logs, report_html, report_json, scans}
+- Logs (fila + rotação, texto ou JSON) e relatórios em Documentos/classicbot/{logs, report_html, report_json, scans}
 - Opções para abrir pastas no explorador
 - Teste de formulário (com finalizar opcional)
 - NOVO: Scan de página (gera inventário de elementos)
+- Retenção em segundo plano: artefatos antigos vão para archive/<tipo>/<dia>.zip (comando 'artifacts')
+- Fila de jobs: 'submit' enfileira, 'worker' executa (vários processos/hosts), 'broker' expõe a fila via TCP
+- Monitor: 'monitor' agenda checks form/scan com navegador quente e grava métricas (texto Prometheus)
+- Regressão visual: form/scan comparam o screenshot com a baseline da URL; 'visual batch' compara pastas
 """
 
 from __future__ import annotations
 import os
 import sys
-import logging
+import multiprocessing
 import subprocess
 from pathlib import Path
-from datetime import datetime
 import click
 
 # --- paths para rodar local e em PyInstaller ---
@@ -26,24 +29,34 @@ if str(SRC_DIR) not in sys.path:
 
 # dirs de saída (Documentos/classicbot/…)
 from utils.paths import classicbot_dirs
+from utils import log_setup
+from utils.retention import run_in_background as run_retention_in_background
 
 # comandos
 from commands.cmd_form import cmd_form
 from commands.cmd_scan import cmd_scan
+from commands.cmd_submit import cmd_submit, cmd_queue_status
+from commands.cmd_worker import cmd_worker, cmd_broker
+from commands.cmd_artifacts import cmd_artifacts
+from commands.cmd_monitor import cmd_monitor
+from commands.cmd_visual import cmd_visual
 
 # -------------------- logging --------------------
-def setup_logging(verbose: bool = False) -> Path:
-    dirs = classicbot_dirs()
-    logs_dir = dirs["logs"]
-    log_path = logs_dir / f"launcher_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
-    level = logging.DEBUG if verbose else logging.INFO
-    logging.basicConfig(
-        level=level,
-        format="%(asctime)s | %(levelname)-8s | %(message)s",
-        handlers=[logging.StreamHandler(sys.stdout), logging.FileHandler(log_path, encoding="utf-8")],
+# comandos de longa duração que podem rodar em vários processos: um arquivo de log por processo
+_PER_PROCESS_LOG = {"worker", "broker", "monitor"}
+
+def setup_logging(verbose: bool = False, json_format: bool = False, max_mb: float = 10,
+                  backups: int = 5, daily: bool = False, subcommand: str | None = None) -> Path:
+    """
+    Logging via fila (não bloqueia quem emite) com arquivo rotativo em Documentos/classicbot/logs.
+    Comandos curtos dividem classicbot.log (rotação com lock entre processos); os de longa duração
+    que rodam em paralelo (worker, broker, monitor) ficam num arquivo por processo.
+    """
+    name = f"{subcommand}_{os.getpid()}" if subcommand in _PER_PROCESS_LOG else "classicbot"
+    return log_setup.setup_logging(
+        classicbot_dirs()["logs"], verbose=verbose, json_format=json_format,
+        name=name, max_mb=max_mb, backups=backups, daily=daily,
     )
-    logging.getLogger("WDM").setLevel(logging.WARNING)
-    return log_path
 
 # -------------------- util: abrir pasta no SO --------------------
 def open_in_file_manager(path: Path) -> bool:
@@ -66,11 +79,20 @@ def open_in_file_manager(path: Path) -> bool:
 @click.group(invoke_without_command=True, context_settings=dict(help_option_names=["-h", "--help"]))
 @click.version_option(message="classic-bot CLI")
 @click.option("--verbose", is_flag=True, help="Ativa logs detalhados.")
+@click.option("--log-json", is_flag=True, help="Grava o log em JSON por linha (run_id, worker, step).")
+@click.option("--log-max-mb", default=10.0, show_default=True, type=float, help="Tamanho para rotação do log.")
+@click.option("--log-backups", default=5, show_default=True, type=int, help="Quantidade de arquivos rotacionados mantidos.")
+@click.option("--log-daily", is_flag=True, help="Rotaciona o log à meia-noite em vez de por tamanho.")
+@click.option("--no-retention", is_flag=True, help="Não roda a retenção de artefatos em segundo plano.")
 @click.pass_context
-def cli(ctx: click.Context, verbose: bool):
+def cli(ctx: click.Context, verbose: bool, log_json: bool, log_max_mb: float, log_backups: int, log_daily: bool,
+        no_retention: bool):
     """Bot de testes do site masterclassic.com.br."""
-    log_file = setup_logging(verbose=verbose)
+    log_file = setup_logging(verbose=verbose, json_format=log_json, max_mb=log_max_mb, backups=log_backups,
+                             daily=log_daily, subcommand=ctx.invoked_subcommand)
     click.echo(f"📄 Log: {log_file}")
+    if not no_retention and ctx.invoked_subcommand != "artifacts":
+        run_retention_in_background(classicbot_dirs())
 
     if ctx.invoked_subcommand is None:
         _menu(ctx)
@@ -153,6 +175,14 @@ def _menu(ctx: click.Context):
 # registro de comandos para uso direto
 cli.add_command(cmd_form)
 cli.add_command(cmd_scan)
+cli.add_command(cmd_submit)
+cli.add_command(cmd_queue_status)
+cli.add_command(cmd_worker)
+cli.add_command(cmd_broker)
+cli.add_command(cmd_artifacts)
+cli.add_command(cmd_monitor)
+cli.add_command(cmd_visual)
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # executável PyInstaller: processos do 'visual batch'
     cli()
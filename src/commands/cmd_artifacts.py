@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Comando: artifacts
+- run:    aplica a retenção agora (logs, relatórios, screenshots, scans) → archive/<tipo>/<dia>.zip
+- search: busca no índice de artefatos arquivados (nome, grupo ou dia)
+- open:   extrai um artefato arquivado (com o grupo dele) e abre no SO/navegador
+Políticas padrão em utils.retention.DEFAULT_POLICIES; sobrescreva em Documentos/classicbot/retention.json
+"""
+
+from __future__ import annotations
+import json
+import logging
+import webbrowser
+import click
+
+from utils.paths import classicbot_dirs
+from utils.retention import ArtifactArchive, load_policies
+
+log = logging.getLogger("cmd_artifacts")
+
+@click.group(name="artifacts", help="Retenção, busca e reabertura de artefatos arquivados.")
+def cmd_artifacts():
+    pass
+
+@cmd_artifacts.command(name="run", help="Arquiva agora os artefatos fora da política de retenção.")
+@click.option("--dry-run", is_flag=True, help="Só mostra o que seria arquivado.")
+def artifacts_run(dry_run: bool):
+    dirs = classicbot_dirs()
+    archive = ArtifactArchive(dirs["base"])
+    policies = load_policies(dirs["base"])
+    summary = archive.run(dirs, policies, dry_run=dry_run)
+    if summary.get("skipped"):
+        click.echo("Retenção já em execução em outro processo.")
+        return 0
+    for kind, info in summary.items():
+        click.echo(f"{kind:12} {info['archived']:5} artefato(s)  {info['bytes'] / 1e6:8.1f} MB"
+                   f"  política={json.dumps(policies.get(kind, {}))}")
+    click.echo("(dry-run: nada foi alterado)" if dry_run else f"📦 Arquivo: {archive.root}")
+    return 0
+
+@cmd_artifacts.command(name="search", help="Busca artefatos arquivados por nome, grupo ou dia (AAAA-MM-DD).")
+@click.argument("term")
+@click.option("--kind", type=click.Choice(["logs", "report_html", "report_json", "screenshots", "scans"]), default=None)
+@click.option("--limit", default=50, show_default=True, type=int)
+def artifacts_search(term: str, kind: str | None, limit: int):
+    rows = ArtifactArchive(classicbot_dirs()["base"]).search(term, kind=kind, limit=limit)
+    if not rows:
+        click.echo("Nada encontrado.")
+        return 1
+    for r in rows:
+        click.echo(f"{r['day']}  {r['kind']:12} {r['name']:40} {r['size'] / 1024:8.1f} KB  {r['archive']}")
+    return 0
+
+@cmd_artifacts.command(name="open", help="Extrai e abre um artefato arquivado (nome exato do arquivo).")
+@click.argument("name")
+def artifacts_open(name: str):
+    path = ArtifactArchive(classicbot_dirs()["base"]).extract(name)
+    if path is None:
+        click.echo(f"Não encontrado no índice: {name}")
+        return 1
+    click.echo(f"Extraído: {path}")
+    try:
+        webbrowser.open(path.resolve().as_uri())
+    except Exception:
+        pass
+    return 0
@@ -3,6 +3,7 @@
 Comando: form
 Fluxo completo alinhado ao /formulario/:
   - Abre home, clica no CTA, espera /formulario
+    (ou, com --warm-start, restaura a sessão salva e abre o /formulario direto)
   - Preenche Passo 1
   - Avança e espera resultados do Passo 2
   - (Opcional) ajusta slider
@@ -15,14 +16,22 @@ Relatórios (HTML/JSON) em Documentos/classicbot/.
 from __future__ import annotations
 import time
 import logging
+from dataclasses import asdict
 from pathlib import Path
 import click
 
+from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
 from utils.paths import classicbot_dirs
-from utils.driver_factory import create_chrome_driver
+from utils.driver_factory import create_chrome_driver, launch_info, format_launch_info
+from utils.profile_pool import ProfilePool, measure_page_load
+from utils.wd_profiler import WebDriverProfiler, format_summary
+from utils.visual_diff import BaselineStore, DEFAULT_MAX_RATIO, parse_masks_option, available as visual_available
+from utils.session_store import (
+    snapshot_path, load_snapshot, save_snapshot, restore_snapshot, bump_warm_runs, discard_snapshot,
+)
 from reporters.html_reporter import HTMLReporter
 from pages.form_page import FormPage
 
@@ -30,6 +39,161 @@ log = logging.getLogger("cmd_form")
 
 DEFAULT_URL = "https://masterclassic.com.br"
 
+def _report_element_cache(reporter: HTMLReporter, page: FormPage | None):
+    """Registra hits/misses do cache de elementos do BasePage no relatório."""
+    if page is None:
+        return
+    stats = page.cache_stats()
+    reporter.meta["element_cache"] = stats
+    reporter.add_step(
+        "Cache de elementos", "info",
+        f"hits={stats['hits']}, misses={stats['misses']}, invalidações={stats['invalidations']}, taxa={stats['hit_rate']:.0%}"
+    )
+
+def _report_profile_load(reporter: HTMLReporter, driver, pool: ProfilePool | None, profile):
+    """Mede a carga do /formulario/ e registra cold × warm do perfil persistente."""
+    if pool is None or profile is None:
+        return
+    try:
+        entry = pool.record_load(profile, measure_page_load(driver))
+    except Exception as e:
+        log.debug("Falha ao medir carga da página: %s", e)
+        return
+    reporter.meta["profile_cache"] = entry
+    summary = entry.get("summary") or {}
+    reporter.add_step(
+        "Carga com perfil persistente", "info",
+        f"{entry['state']} ({entry['slot']}): {entry.get('load_ms')} ms, "
+        f"{(entry.get('transfer_bytes') or 0) / 1024:.0f} KB trafegados, "
+        f"{entry.get('cached_resources', 0)}/{entry.get('resources', 0)} recursos do cache | "
+        f"média cold={summary.get('cold_avg_ms')} ms, warm={summary.get('warm_avg_ms')} ms"
+    )
+
+def _report_browser(reporter: HTMLReporter, driver):
+    """Registra perfil de inicialização, tempo de launch e RSS do navegador (dimensionamento de workers)."""
+    if driver is None:
+        return
+    try:
+        info = launch_info(driver)
+    except Exception as e:
+        log.debug("Falha ao medir o navegador: %s", e)
+        return
+    reporter.meta["browser"] = info
+    reporter.add_step("Recursos do navegador", "info", format_launch_info(info))
+
+def _report_visual(reporter: HTMLReporter, shot: Path, url: str, html_dir: Path, masks, max_ratio: float,
+                   update: bool):
+    """Regressão visual do screenshot de sucesso contra a baseline da URL; diff_ratio vira um passo."""
+    if not visual_available():
+        reporter.add_step("Regressão visual", "info", "Indisponível (instale numpy e Pillow).")
+        return
+    try:
+        result = BaselineStore(classicbot_dirs()["baselines"]).check(
+            shot, url, "form_success", heatmap_path=shot.with_name(f"{shot.stem}_diff.png"),
+            masks=masks, max_ratio=max_ratio, update=update,
+        )
+    except Exception as e:
+        log.warning("Falha na regressão visual: %s", e)
+        reporter.add_step("Regressão visual", "info", f"Falha ao comparar: {e}")
+        return
+    reporter.meta["visual_diff"] = asdict(result)
+    status = {"identical": "pass", "pass": "pass", "fail": "fail"}.get(result.status, "info")
+    reporter.add_step("Regressão visual", status, result.summary(),
+                      screenshot=str(Path(result.heatmap).relative_to(html_dir)) if result.heatmap else "")
+
+def _report_wd_profile(reporter: HTMLReporter, profiler: WebDriverProfiler | None):
+    """Encerra o profiler e grava o resumo (top comandos, por passo, por call site) no relatório."""
+    if profiler is None:
+        return
+    profiler.detach()
+    names = {str(i): f"{i}. {s.name}" for i, s in enumerate(reporter.steps, 1)}
+    summary = profiler.summary(step_names=names)
+    reporter.meta["webdriver_profile"] = summary
+    reporter.add_step("Perfil WebDriver", "info", format_summary(summary)
+                      + (f" | cProfile: {summary['python_profile']}" if summary["python_profile"] else ""))
+
+def open_form_full(driver, url: str, reporter: HTMLReporter):
+    """Caminho completo: HOME → CTA → /formulario/ (mesma aba ou nova aba)."""
+    driver.get(url)
+    reporter.add_step("Acessar site", "pass", f"URL: {url}")
+
+    # clique no CTA “Simule Agora” da home
+    try:
+        cta = WebDriverWait(driver, 20).until(
+            EC.element_to_be_clickable((By.CSS_SELECTOR, "a[href$='/formulario/'], a[href*='/formulario']"))
+        )
+    except Exception:
+        try:
+            cta = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.LINK_TEXT, "Simule Agora")))
+        except Exception:
+            cta = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.PARTIAL_LINK_TEXT, "Simule")))
+    reporter.add_step("Localizar CTA", "pass")
+
+    prev = set(driver.window_handles)
+    cta.click()
+
+    # espera /formulario (mesma aba) ou troca pra nova aba e valida a URL
+    wait = WebDriverWait(driver, 20)
+    try:
+        wait.until(EC.url_contains("/formulario"))  # recomendado para fragmento de URL
+        reporter.add_step("Abrir /formulario", "pass", "URL contém /formulario")
+    except Exception:
+        new_handles = [h for h in driver.window_handles if h not in prev]
+        if new_handles:
+            driver.switch_to.window(new_handles[-1])
+            wait.until(EC.url_contains("/formulario"))
+            reporter.add_step("Trocar para nova aba", "pass", "Formulário ativo em nova aba")
+        else:
+            raise
+
+def _open_form_warm(driver, snap: dict, reporter: HTMLReporter) -> bool:
+    """
+    Warm start: restaura o snapshot e vai direto para o formulário.
+    Se o snapshot estiver velho/inválido (form não aparece), volta para about:blank e retorna False.
+    """
+    try:
+        restore_snapshot(driver, snap)
+        if "/formulario" not in driver.current_url:
+            raise RuntimeError(f"URL inesperada: {driver.current_url}")
+        FormPage(driver, timeout=10).wait_form_ready()
+        reporter.add_step("Warm start", "pass", f"Sessão restaurada ({snap.get('checkpoint')}): {snap['url']}")
+        return True
+    except Exception as e:
+        log.info("Warm start falhou, usando caminho completo: %s", e)
+        reporter.add_step("Warm start", "info", f"Snapshot descartado, usando caminho completo: {e}")
+        try:
+            driver.delete_all_cookies()
+            driver.get("about:blank")
+        except Exception:
+            pass
+        return False
+
+def fill_form(page: FormPage, reporter: HTMLReporter, nome: str, email: str, nascimento: str, telefone: str,
+              renda: str, slider: int | None = None) -> bool:
+    """Passos 1 a 3 a partir do formulário pronto (sem finalizar). Retorna se o botão de finalizar habilitou."""
+    # Passo 1
+    page.fill_step1(nome=nome, email=email, nascimento=nascimento, telefone=telefone, renda_value=renda)
+    reporter.add_step("Preencher Passo 1", "pass", f"nome={nome}, email={email}, nasc={nascimento}, tel={telefone}, renda={renda}")
+
+    page.advance_from_step1()
+    reporter.add_step("Avançar para Passo 2", "pass")
+
+    # Passo 2
+    if slider is not None:
+        page.set_slider_if_needed(slider)
+        reporter.add_step("Ajustar slider", "info", f"valor={slider}")
+    page.next_from_step2()
+    reporter.add_step("Avançar para Passo 3", "pass")
+
+    # Passo 3
+    page.accept_declarations()
+    ready = page.is_ready_to_finalize()
+    if ready:
+        reporter.add_step("Aceite final", "pass", "Botão 'Pagar e Contratar' habilitado.")
+    else:
+        reporter.add_step("Aceite final", "info", "Botão não habilitou automaticamente.")
+    return ready
+
 @click.command(name="form", help="Executa o fluxo do formulário e gera relatório HTML.")
 @click.option("--url", default=DEFAULT_URL, show_default=True, help="URL do site (home).")
 @click.option("--nome", default="Teste QA", show_default=True)
@@ -47,7 +211,34 @@ DEFAULT_URL = "https://masterclassic.com.br"
 @click.option("--chrome-binary", default=None, help="Caminho para o Chrome (Windows) ou binário do navegador.")
 @click.option("--finalizar", is_flag=True, help="(Perigoso) Clica em 'Pagar e Contratar' para testar backend.")
 @click.option("--forcar-finalizar", is_flag=True, help="Força o clique (remove 'disabled' via JS) se o botão não habilitar.")
-def cmd_form(url, nome, email, nascimento, telefone, renda, slider, headed, chrome_binary, finalizar, forcar_finalizar):
+@click.option("--warm-start", is_flag=True, help="Restaura a sessão salva e vai direto ao /formulario/ (salva um novo snapshot ao chegar lá).")
+@click.option("--session-max-age", default=24.0, show_default=True, type=float, help="Idade máxima do snapshot de sessão (horas).")
+@click.option("--full-every", default=10, show_default=True, type=click.IntRange(min=1),
+              help="Com --warm-start, força o caminho completo (home → CTA) a cada N execuções.")
+@click.option("--profile-cache", is_flag=True, help="Usa um perfil persistente do pool (mantém o cache HTTP entre execuções).")
+@click.option("--profile-cache-mb", default=512, show_default=True, type=click.IntRange(min=16),
+              help="Limite total (MB) dos perfis persistentes; os menos usados são removidos.")
+@click.option("--clear-profile-state", is_flag=True, help="Com --profile-cache, limpa cookies/storage do perfil mas mantém o cache.")
+@click.option("--no-open", is_flag=True, help="Não abre o relatório no navegador ao final (execuções em lote/worker).")
+@click.option("--launch-profile", type=click.Choice(["default", "lean"]), default="default", show_default=True,
+              help="lean: sem serviços em segundo plano, renderers limitados e chrome-headless-shell se houver.")
+@click.option("--page-load", "page_load_strategy", type=click.Choice(["normal", "eager"]), default="normal",
+              show_default=True, help="eager: navegação volta no DOMContentLoaded.")
+@click.option("--browser-logs", is_flag=True, help="Captura logs do console do navegador (sempre ligado no perfil default).")
+@click.option("--visual/--no-visual", default=True, show_default=True,
+              help="Compara o screenshot com a baseline da URL (regressão visual; requer NumPy + Pillow).")
+@click.option("--update-baseline", is_flag=True, help="Grava o screenshot desta execução como nova baseline.")
+@click.option("--visual-max-ratio", default=DEFAULT_MAX_RATIO, show_default=True, type=click.FloatRange(0, 1),
+              help="Fração de pixels alterados tolerada antes de falhar (com tamanhos diferentes, o excedente conta como alterado).")
+@click.option("--visual-mask", "visual_masks", multiple=True, callback=parse_masks_option,
+              help="Região dinâmica ignorada (x,y,w,h em px da imagem). Repetível; fica gravada na baseline.")
+@click.option("--profile", "wd_profile", is_flag=True,
+              help="Registra cada comando WebDriver (duração, bytes, call site) e resume no relatório.")
+@click.option("--profile-python", is_flag=True, help="Com --profile, grava também um cProfile (.prof) junto ao JSON do relatório.")
+def cmd_form(url, nome, email, nascimento, telefone, renda, slider, headed, chrome_binary, finalizar, forcar_finalizar,
+             warm_start, session_max_age, full_every, profile_cache, profile_cache_mb, clear_profile_state, no_open,
+             launch_profile, page_load_strategy, browser_logs, visual, update_baseline, visual_max_ratio, visual_masks,
+             wd_profile, profile_python):
     dirs = classicbot_dirs()
     html_dir = dirs["report_html"]
     json_dir = dirs["report_json"]
@@ -56,73 +247,68 @@ def cmd_form(url, nome, email, nascimento, telefone, renda, slider, headed, chro
 
     reporter = HTMLReporter(out_dir=html_dir, json_out_dir=json_dir)
     driver = None
+    page = None
+    pool = None
+    profile = None
+    profiler = None
 
     try:
-        # ---- HOME → CTA → /formulario/ ----
+        # ---- HOME → CTA → /formulario/ (ou warm start) ----
         log.info("Iniciando | headed=%s | url=%s", headed, url)
-        reporter.add_step("Abrir navegador", "info", f"Headless: {not headed}")
-        driver = create_chrome_driver(headless=not headed, chrome_binary=chrome_binary)
+        reporter.add_step("Abrir navegador", "info", f"Headless: {not headed}, perfil: {launch_profile}")
+        if profile_cache:
+            pool = ProfilePool(dirs["profiles"], max_bytes=profile_cache_mb * 1024 * 1024)
+            profile = pool.acquire()
+            if clear_profile_state:
+                pool.clear_state(profile)
+            reporter.add_step("Perfil persistente", "info",
+                              f"{profile.slot} ({'warm' if profile.warm else 'cold'})"
+                              + (" — estado limpo, cache mantido" if clear_profile_state else ""))
+        driver = create_chrome_driver(
+            headless=not headed, chrome_binary=chrome_binary,
+            user_data_dir=profile.path if profile else None,
+            disk_cache_bytes=pool.slot_cache_bytes if pool else None,
+            launch_profile=launch_profile, page_load_strategy=page_load_strategy,
+            browser_logs=True if browser_logs else None,
+        )
+        if wd_profile:
+            prof_path = json_dir / f"profile_{reporter.meta['run_id']}.prof" if profile_python else None
+            profiler = WebDriverProfiler(driver, python_profile=prof_path).attach()
 
         driver.set_page_load_timeout(60)
-        driver.get(url)
-        reporter.add_step("Acessar site", "pass", f"URL: {url}")
 
-        # clique no CTA “Simule Agora” da home
-        from selenium.webdriver.common.by import By
-        try:
-            cta = WebDriverWait(driver, 20).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, "a[href$='/formulario/'], a[href*='/formulario']"))
-            )
-        except Exception:
-            try:
-                cta = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.LINK_TEXT, "Simule Agora")))
-            except Exception:
-                cta = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.PARTIAL_LINK_TEXT, "Simule")))
-        reporter.add_step("Localizar CTA", "pass")
+        snap_path = snapshot_path(dirs["sessions"], url)
+        snap = None
+        if warm_start:
+            snap = load_snapshot(snap_path, max_age_s=session_max_age * 3600)
+            if snap and int(snap.get("warm_runs", 0)) >= full_every:
+                reporter.add_step("Warm start", "info", f"Caminho completo periódico (a cada {full_every} execuções).")
+                snap = None
 
-        prev = set(driver.window_handles)
-        cta.click()
-
-        # espera /formulario (mesma aba) ou troca pra nova aba e valida a URL
-        wait = WebDriverWait(driver, 20)
-        try:
-            wait.until(EC.url_contains("/formulario"))  # recomendado para fragmento de URL
-            reporter.add_step("Abrir /formulario", "pass", "URL contém /formulario")
-        except Exception:
-            new_handles = [h for h in driver.window_handles if h not in prev]
-            if new_handles:
-                driver.switch_to.window(new_handles[-1])
-                wait.until(EC.url_contains("/formulario"))
-                reporter.add_step("Trocar para nova aba", "pass", "Formulário ativo em nova aba")
-            else:
-                raise
+        if snap and _open_form_warm(driver, snap, reporter):
+            page = FormPage(driver)
+            bump_warm_runs(snap_path, snap)
+        else:
+            if snap:
+                discard_snapshot(snap_path)
+            open_form_full(driver, url, reporter)
 
         # ---- FORMULÁRIO: passos ----
-        page = FormPage(driver)
-        page.wait_form_ready()
+        if page is None:
+            page = FormPage(driver)
+            page.wait_form_ready()
+            if warm_start:
+                try:
+                    save_snapshot(driver, snap_path, checkpoint="formulario")
+                    reporter.add_step("Snapshot de sessão", "info", f"Salvo em {snap_path.name}")
+                except Exception as err:
+                    log.warning("Falha ao salvar snapshot de sessão: %s", err)
         reporter.add_step("Formulário pronto (Passo 1)", "pass")
+        _report_profile_load(reporter, driver, pool, profile)
 
-        # Passo 1
-        page.fill_step1(nome=nome, email=email, nascimento=nascimento, telefone=telefone, renda_value=renda)
-        reporter.add_step("Preencher Passo 1", "pass", f"nome={nome}, email={email}, nasc={nascimento}, tel={telefone}, renda={renda}")
-
-        page.advance_from_step1()
-        reporter.add_step("Avançar para Passo 2", "pass")
-
-        # Passo 2
-        if slider is not None:
-            page.set_slider_if_needed(slider)
-            reporter.add_step("Ajustar slider", "info", f"valor={slider}")
-        page.next_from_step2()
-        reporter.add_step("Avançar para Passo 3", "pass")
-
-        # Passo 3
-        page.accept_declarations()
-        ready = page.is_ready_to_finalize()
-        if ready:
-            reporter.add_step("Aceite final", "pass", "Botão 'Pagar e Contratar' habilitado.")
-        else:
-            reporter.add_step("Aceite final", "info", "Botão não habilitou automaticamente.")
+        # Passos 1 a 3
+        fill_form(page, reporter, nome=nome, email=email, nascimento=nascimento, telefone=telefone,
+                  renda=renda, slider=slider)
 
         # ---------- NOVO: execução opcional da finalização ----------
         if finalizar:
@@ -152,8 +338,13 @@ def cmd_form(url, nome, email, nascimento, telefone, renda, slider, headed, chro
         driver.save_screenshot(str(shot_ok))
         reporter.add_step("Captura de tela", "info", "Screenshot salvo",
                           screenshot=str(shot_ok.relative_to(html_dir)))
+        if visual:
+            _report_visual(reporter, shot_ok, url, html_dir, visual_masks, visual_max_ratio, update_baseline)
 
-        reporter.save(open_in_browser=True)
+        _report_element_cache(reporter, page)
+        _report_browser(reporter, driver)
+        _report_wd_profile(reporter, profiler)
+        reporter.save(open_in_browser=not no_open)
         log.info("Fluxo do formulário finalizado com sucesso.")
         return 0
 
@@ -169,9 +360,14 @@ def cmd_form(url, nome, email, nascimento, telefone, renda, slider, headed, chro
             pass
 
         reporter.add_step("Erro durante o teste", "fail", str(e))
-        reporter.save(open_in_browser=True)
+        _report_element_cache(reporter, page)
+        _report_browser(reporter, driver)
+        _report_wd_profile(reporter, profiler)
+        reporter.save(open_in_browser=not no_open)
         return 1
 
     finally:
         if driver:
             driver.quit()
+        if pool and profile:
+            pool.release(profile)
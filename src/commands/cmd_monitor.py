@@ -0,0 +1,358 @@
+# -*- coding: utf-8 -*-
+"""
+Comando: monitor
+- Processo de longa duração que agenda checks sintéticos: form (home → CTA → passos 1..3, sem finalizar)
+  e scan (carregar + inventário), cada um com seu intervalo e jitter
+- Um navegador "quente" reaproveitado entre checks (cache HTTP, processo já iniciado); execuções nunca se
+  sobrepõem — se um check atrasa, os horários perdidos são pulados (contados como overruns)
+- O navegador é reciclado quando o RSS cresce além do limite, após N checks ou se a sessão cair
+- Métricas em texto Prometheus (durações por passo, taxa de sucesso na janela, último erro, RSS),
+  gravadas atomicamente a cada check — ex.: textfile collector do node_exporter
+- Status compacto no console (uma linha por check)
+"""
+
+from __future__ import annotations
+import os
+import time
+import random
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Deque, Tuple
+from urllib.parse import urlparse
+import click
+
+from utils.paths import classicbot_dirs
+from utils.driver_factory import create_chrome_driver, browser_rss
+from utils.log_setup import set_context
+from reporters.html_reporter import HTMLReporter
+from pages.form_page import FormPage
+from commands.cmd_form import DEFAULT_URL, fill_form, open_form_full
+from commands.cmd_scan import scan_page, wait_ready
+
+log = logging.getLogger("cmd_monitor")
+
+# dados de teste do check de formulário (mesmos padrões do comando form)
+FORM_DATA = dict(nome="Teste QA", email="qa@example.com", nascimento="01/01/1990", telefone="11999999999",
+                 renda="5000-7000")
+
+# tudo exceto cookies (limpos à parte) e o cache HTTP
+_CLEARED_STORAGE = "local_storage,indexeddb,websql,service_workers,cache_storage,file_systems,shader_cache"
+
+def _origin(url: str) -> Optional[str]:
+    parsed = urlparse(url or "")
+    return f"{parsed.scheme}://{parsed.netloc}" if parsed.scheme in ("http", "https") and parsed.netloc else None
+
+@dataclass
+class Check:
+    kind: str  # "form" | "scan"
+    url: str
+    interval: float
+    window: int = 20
+    anchor: float = 0.0  # horário sem jitter; a grade de execuções avança sobre ele
+    next_due: float = 0.0  # anchor + jitter
+    runs: int = 0
+    failures: int = 0
+    overruns: int = 0
+    last_run_ts: float = 0.0
+    last_duration_s: Optional[float] = None
+    last_steps: Dict[str, float] = field(default_factory=dict)
+    last_error: str = ""
+    history: Deque[bool] = field(default_factory=deque)
+
+    def __post_init__(self):
+        self.history = deque(maxlen=self.window)
+
+    @property
+    def name(self) -> str:
+        parsed = urlparse(self.url)
+        return f"{self.kind} {parsed.netloc or self.url}{parsed.path.rstrip('/')}"
+
+    @property
+    def success_ratio(self) -> Optional[float]:
+        return sum(self.history) / len(self.history) if self.history else None
+
+    def schedule_next(self, now: float, jitter: float) -> None:
+        """
+        Próximo horário = âncora anterior + intervalo; horários já perdidos são pulados (sem rajada
+        de atraso). O jitter vale só para o horário devolvido, então não se acumula entre execuções.
+        """
+        due = self.anchor + self.interval
+        if due < now:
+            missed = int((now - due) // self.interval) + 1
+            self.overruns += missed
+            due += missed * self.interval
+        self.anchor = due
+        self.next_due = due + random.uniform(-jitter, jitter) * self.interval
+
+class WarmBrowser:
+    """Navegador reaproveitado entre checks; recicla por crescimento de memória, idade ou sessão perdida."""
+
+    def __init__(self, headless: bool, launch_profile: str, page_load_strategy: str,
+                 growth: float, max_rss_mb: float, recycle_every: int):
+        self.headless = headless
+        self.launch_profile = launch_profile
+        self.page_load_strategy = page_load_strategy
+        self.growth = growth
+        self.max_rss_bytes = max_rss_mb * 1024 * 1024
+        self.recycle_every = recycle_every
+        self.driver = None
+        self.launches = 0
+        self.recycles = 0
+        self.checks_since_launch = 0
+        self.baseline_rss: Optional[int] = None
+        self.last_rss: Optional[int] = None
+        self.last_launch_ms: Optional[float] = None
+
+    def get(self):
+        if self.driver is None:
+            self.driver = create_chrome_driver(
+                headless=self.headless, launch_profile=self.launch_profile,
+                page_load_strategy=self.page_load_strategy,
+            )
+            self.driver.set_page_load_timeout(60)
+            self.launches += 1
+            self.checks_since_launch = 0
+            self.baseline_rss = None
+            self.last_launch_ms = self.driver.launch_info["launch_ms"]
+            log.info("Navegador iniciado (%s ms, perfil %s).", self.last_launch_ms, self.launch_profile)
+        return self.driver
+
+    def reset(self) -> None:
+        """
+        Estado limpo entre checks: abas extras, cookies, local/sessionStorage, IndexedDB, service
+        workers e Cache Storage das origens visitadas. Mantém o processo e o cache HTTP (o ganho do
+        navegador quente).
+        """
+        driver = self.driver
+        handles = driver.window_handles
+        origins = set()
+        for h in reversed(handles):
+            driver.switch_to.window(h)
+            origins.add(_origin(driver.current_url))
+            try:
+                driver.execute_script("try { sessionStorage.clear(); } catch (e) {}")
+            except Exception:
+                pass
+            if h != handles[0]:
+                driver.close()
+        driver.switch_to.window(handles[0])
+        try:
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        except Exception:
+            driver.delete_all_cookies()
+        for origin in origins - {None}:
+            try:
+                driver.execute_cdp_cmd("Storage.clearDataForOrigin",
+                                       {"origin": origin, "storageTypes": _CLEARED_STORAGE})
+            except Exception as e:
+                log.debug("Storage.clearDataForOrigin(%s) falhou: %s", origin, e)
+        driver.get("about:blank")
+
+    def after_check(self, ok: bool) -> Optional[str]:
+        """Mede o RSS e decide se recicla. Retorna o motivo da reciclagem (ou None)."""
+        if self.driver is None:
+            return None
+        self.checks_since_launch += 1
+        reason = None
+        try:
+            self.reset()
+        except Exception as e:
+            reason = f"sessão indisponível ({type(e).__name__})"
+        if reason is None:
+            rss = browser_rss(self.driver)
+            self.last_rss = rss["rss_bytes"] if rss else None
+            if self.last_rss is not None:
+                if self.baseline_rss is None and ok:
+                    self.baseline_rss = self.last_rss  # referência: após o primeiro check bem-sucedido
+                if self.last_rss > self.max_rss_bytes:
+                    reason = f"RSS {self.last_rss / 1048576:.0f} MB acima do limite"
+                elif self.baseline_rss and self.last_rss > self.baseline_rss * self.growth:
+                    reason = f"RSS cresceu {self.last_rss / self.baseline_rss:.1f}× desde o início"
+            if reason is None and self.recycle_every and self.checks_since_launch >= self.recycle_every:
+                reason = f"{self.checks_since_launch} checks desde o início"
+        if reason:
+            log.info("Reciclando navegador: %s", reason)
+            self.recycles += 1
+            self.quit()
+        return reason
+
+    def quit(self) -> None:
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            self.driver = None
+
+def _form_check(driver, reporter: HTMLReporter, url: str) -> None:
+    open_form_full(driver, url, reporter)
+    page = FormPage(driver)
+    page.wait_form_ready()
+    reporter.add_step("Formulário pronto (Passo 1)", "pass")
+    if not fill_form(page, reporter, **FORM_DATA):
+        raise RuntimeError("Botão 'Pagar e Contratar' não habilitou após o aceite.")
+
+def _scan_check(driver, reporter: HTMLReporter, url: str) -> None:
+    driver.get(url)
+    wait_ready(driver)
+    reporter.add_step("Carregar página", "pass", f"URL: {url}")
+    elements, frames = scan_page(driver)
+    if not elements:
+        raise RuntimeError("Nenhum elemento inventariado.")
+    reporter.add_step("Inventário", "pass", f"{len(elements)} elementos em {len(frames)} frames")
+
+_CHECKS = {"form": _form_check, "scan": _scan_check}
+
+def run_check(check: Check, browser: WarmBrowser, save_reports: str) -> Tuple[bool, Optional[str]]:
+    """Executa um check no navegador quente e atualiza o estado. Retorna (ok, motivo da reciclagem)."""
+    dirs = classicbot_dirs()
+    reporter = HTMLReporter(out_dir=dirs["report_html"], json_out_dir=dirs["report_json"])
+    reporter.meta["monitor"] = {"check": check.kind, "url": check.url}
+    t0 = time.perf_counter()
+    ok, error = False, ""
+    try:
+        _CHECKS[check.kind](browser.get(), reporter, check.url)
+        ok = True
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}".splitlines()[0][:300]
+        log.warning("Check %s falhou: %s", check.name, error)
+        reporter.add_step("Erro durante o teste", "fail", error)
+    duration = time.perf_counter() - t0
+    set_context(step="-")
+
+    check.runs += 1
+    check.failures += 0 if ok else 1
+    check.history.append(ok)
+    check.last_run_ts = time.time()
+    check.last_duration_s = round(duration, 3)
+    check.last_error = error or check.last_error
+    steps: Dict[str, float] = {}
+    for s in reporter.steps:
+        steps[s.name] = steps.get(s.name, 0.0) + s.duration_ms / 1000
+    check.last_steps = steps
+
+    if save_reports == "always" or (save_reports == "fail" and not ok):
+        try:
+            reporter.save(open_in_browser=False)
+        except Exception as e:
+            log.warning("Falha ao salvar relatório do check: %s", e)
+    return ok, browser.after_check(ok)
+
+def _label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def render_metrics(checks: List[Check], browser: WarmBrowser) -> str:
+    """Exposição em texto Prometheus (HELP/TYPE + amostras)."""
+    out: List[str] = []
+
+    def metric(name: str, kind: str, help_: str, samples: List[Tuple[Dict[str, str], Optional[float]]]):
+        samples = [(lbl, v) for lbl, v in samples if v is not None]
+        if not samples:
+            return
+        out.append(f"# HELP {name} {help_}")
+        out.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            lbl = ",".join(f'{k}="{_label(v)}"' for k, v in labels.items())
+            out.append(f"{name}{{{lbl}}} {value}" if lbl else f"{name} {value}")
+
+    base = [({"check": c.kind, "url": c.url}, c) for c in checks]
+    metric("classicbot_check_up", "gauge", "1 se a última execução passou.",
+           [(l, (1 if c.history[-1] else 0) if c.history else None) for l, c in base])
+    metric("classicbot_check_duration_seconds", "gauge", "Duração da última execução.",
+           [(l, c.last_duration_s) for l, c in base])
+    metric("classicbot_check_step_duration_seconds", "gauge", "Duração de cada passo na última execução.",
+           [({**l, "step": step}, round(v, 3)) for l, c in base for step, v in c.last_steps.items()])
+    metric("classicbot_check_success_ratio", "gauge", "Taxa de sucesso na janela de execuções recentes.",
+           [(l, round(c.success_ratio, 4) if c.success_ratio is not None else None) for l, c in base])
+    metric("classicbot_check_runs_total", "counter", "Execuções desde o início do monitor.", [(l, c.runs) for l, c in base])
+    metric("classicbot_check_failures_total", "counter", "Falhas desde o início do monitor.", [(l, c.failures) for l, c in base])
+    metric("classicbot_check_overruns_total", "counter", "Horários pulados porque a execução anterior atrasou.",
+           [(l, c.overruns) for l, c in base])
+    metric("classicbot_check_last_run_timestamp_seconds", "gauge", "Horário (epoch) da última execução.",
+           [(l, round(c.last_run_ts, 3) if c.runs else None) for l, c in base])
+    metric("classicbot_check_last_error_info", "gauge", "Último erro registrado (no rótulo 'error').",
+           [({**l, "error": c.last_error}, 1) for l, c in base if c.last_error])
+    metric("classicbot_browser_rss_bytes", "gauge", "RSS somado do navegador após o último check.",
+           [({}, browser.last_rss)])
+    metric("classicbot_browser_launch_seconds", "gauge", "Tempo de inicialização do navegador atual/último.",
+           [({}, round(browser.last_launch_ms / 1000, 3) if browser.last_launch_ms is not None else None)])
+    metric("classicbot_browser_launches_total", "counter", "Navegadores iniciados.", [({}, browser.launches)])
+    metric("classicbot_browser_recycles_total", "counter", "Reciclagens do navegador.", [({}, browser.recycles)])
+    return "\n".join(out) + "\n"
+
+def write_metrics(path: Path, text: str) -> None:
+    """tmp + os.replace: o coletor nunca lê um arquivo pela metade."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+def _status_line(check: Check, ok: bool, browser: WarmBrowser, now: float) -> str:
+    ratio = check.success_ratio or 0.0
+    rss = f" · RSS {browser.last_rss / 1048576:.0f} MB" if browser.last_rss else ""
+    err = "" if ok else f" · {check.last_error[:80]}"
+    return (f"{'✅' if ok else '❌'} {check.name:<40} {check.last_duration_s:6.1f}s · "
+            f"{sum(check.history)}/{len(check.history)} ok ({ratio:.0%}) · "
+            f"próximo em {max(0, check.next_due - now):.0f}s{rss}{err}")
+
+@click.command(name="monitor", help="Checks sintéticos agendados (form/scan) com navegador quente e métricas.")
+@click.option("--form", "form_urls", multiple=True, help="URL (home) para o check de formulário. Repetível.")
+@click.option("--scan", "scan_urls", multiple=True, help="URL para o check de scan. Repetível.")
+@click.option("--form-every", default=300.0, show_default=True, type=click.FloatRange(min=1), help="Intervalo (s) dos checks de formulário.")
+@click.option("--scan-every", default=900.0, show_default=True, type=click.FloatRange(min=1), help="Intervalo (s) dos checks de scan.")
+@click.option("--jitter", default=0.1, show_default=True, type=click.FloatRange(0, 0.5),
+              help="Variação aleatória do intervalo (fração), para não sincronizar com outros monitores.")
+@click.option("--headed", is_flag=True, help="Executa com interface gráfica (sem headless).")
+@click.option("--launch-profile", type=click.Choice(["default", "lean"]), default="lean", show_default=True,
+              help="Perfil de inicialização do navegador.")
+@click.option("--page-load", "page_load_strategy", type=click.Choice(["normal", "eager"]), default="normal",
+              show_default=True, help="eager: navegação volta no DOMContentLoaded.")
+@click.option("--recycle-growth", default=1.5, show_default=True, type=click.FloatRange(min=1),
+              help="Recicla o navegador quando o RSS passa de N× o medido após o primeiro check.")
+@click.option("--max-rss-mb", default=1500.0, show_default=True, type=float, help="Recicla acima deste RSS absoluto.")
+@click.option("--recycle-every", default=100, show_default=True, type=click.IntRange(min=0),
+              help="Recicla após N checks (0 = nunca).")
+@click.option("--window", default=20, show_default=True, type=click.IntRange(min=1), help="Execuções na taxa de sucesso.")
+@click.option("--metrics-file", type=click.Path(dir_okay=False), default=None,
+              help="Arquivo de métricas (padrão: Documentos/classicbot/monitor/classicbot.prom).")
+@click.option("--save-reports", type=click.Choice(["never", "fail", "always"]), default="fail", show_default=True,
+              help="Quando gravar o relatório HTML/JSON de um check.")
+@click.option("--max-runs", default=0, show_default=True, type=int, help="Encerra após N checks (0 = sem limite).")
+def cmd_monitor(form_urls, scan_urls, form_every, scan_every, jitter, headed, launch_profile, page_load_strategy,
+                recycle_growth, max_rss_mb, recycle_every, window, metrics_file, save_reports, max_runs):
+    if not form_urls and not scan_urls:
+        form_urls = (DEFAULT_URL,)
+    checks = [Check("form", u, form_every, window) for u in form_urls] + \
+             [Check("scan", u, scan_every, window) for u in scan_urls]
+    metrics_path = Path(metrics_file) if metrics_file else classicbot_dirs()["base"] / "monitor" / "classicbot.prom"
+    browser = WarmBrowser(not headed, launch_profile, page_load_strategy, recycle_growth, max_rss_mb, recycle_every)
+    set_context(worker="monitor")
+
+    # primeiras execuções espalhadas dentro do jitter
+    now = time.monotonic()
+    for c in checks:
+        c.anchor = c.next_due = now + random.uniform(0, jitter) * c.interval
+    click.echo(f"🩺 Monitor: {len(checks)} check(s) · métricas em {metrics_path}")
+
+    done = 0
+    try:
+        while not max_runs or done < max_runs:
+            check = min(checks, key=lambda c: c.next_due)
+            wait = check.next_due - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            ok, recycled = run_check(check, browser, save_reports)
+            done += 1
+            now = time.monotonic()
+            check.schedule_next(now, jitter)
+            write_metrics(metrics_path, render_metrics(checks, browser))
+            click.echo(_status_line(check, ok, browser, now))
+            if recycled:
+                click.echo(f"♻️  Navegador reciclado: {recycled}")
+    except KeyboardInterrupt:
+        click.echo("⏹️  Monitor interrompido.")
+    finally:
+        browser.quit()
+    return 0 if all(c.history and c.history[-1] for c in checks if c.runs) else 1
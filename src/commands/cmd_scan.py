@@ -3,55 +3,65 @@
 Comando: scan
 - Solicita URL (ou usa --url)
 - Abre a página e varre elementos relevantes (inputs, selects, textareas, buttons, a, label, [role=button], [data-testid])
+  numa única passada de TreeWalker que desce em shadow roots abertos e iframes same-origin;
+  iframes cross-origin são visitados via switch_to.frame (uma chamada de script por frame)
 - Coleta atributos (id, name, type, placeholder, href, class, data-testid, aria-label, role, text)
-- Gera candidatos de seletores (CSS) e verifica se são únicos via querySelectorAll
+- Gera candidatos de seletores (CSS) e verifica se são únicos via querySelectorAll (no root do elemento)
+  com o caminho de frames/shadow roots (frame_path / shadow_path) e tempo por frame
+- Coleta geometria (rect em px CSS da página, visible, in_viewport) na mesma passada de JS
+- Screenshot da página inteira (CDP) e miniaturas por elemento recortadas dele em paralelo
 - Salva JSON + HTML em Documentos/classicbot/scans e abre o HTML no navegador
 """
 
 from __future__ import annotations
 import json
+import html
 import time
 import logging
+from dataclasses import asdict
 from pathlib import Path
 import click
 
 from selenium.webdriver.support.ui import WebDriverWait
 
 from utils.paths import classicbot_dirs
-from utils.driver_factory import create_chrome_driver
+from utils.driver_factory import create_chrome_driver, launch_info, format_launch_info
+from utils.profile_pool import ProfilePool, measure_page_load
+from utils.screenshots import capture_full_page, ThumbnailJob
+from utils.log_setup import set_context
+from utils.wd_profiler import WebDriverProfiler, format_summary
+from utils.visual_diff import BaselineStore, DEFAULT_MAX_RATIO, parse_masks_option, available as visual_available
 
 log = logging.getLogger("cmd_scan")
 
-def _wait_ready(driver, timeout=20):
+def wait_ready(driver, timeout=20):
     WebDriverWait(driver, timeout).until(lambda d: d.execute_script("return document.readyState") == "complete")
 
-@click.command(name="scan", help="Faz o inventário de elementos de uma página e gera JSON + HTML em 'scans'.")
-@click.option("--url", prompt=True, help="URL da página a escanear.")
-@click.option("--headed", is_flag=True, help="Executa com interface gráfica (sem headless).")
-def cmd_scan(url: str, headed: bool):
-    dirs = classicbot_dirs()
-    scans_dir = dirs["scans"]
-    scans_dir.mkdir(parents=True, exist_ok=True)
-
-    driver = None
-    try:
-        driver = create_chrome_driver(headless=not headed)
-        driver.set_page_load_timeout(60)
-        driver.get(url)
-        _wait_ready(driver)
-
-        # Screenshot da página
-        ts = int(time.time() * 1000)
-        shot = scans_dir / f"scan_{ts}.png"
-        try:
-            driver.save_screenshot(str(shot))
-        except Exception:
-            pass
-
-        # JS: coleta elementos + candidatos de seletores e verifica unicidade
-        script = r"""
-return (function(){
+# JS: percorre a árvore composta (documento + shadow roots abertos + iframes same-origin) com TreeWalker,
+# coleta elementos + candidatos de seletores (unicidade verificada no root do elemento) e devolve os
+# iframes cross-origin para o Python entrar neles (switch_to.frame) numa segunda rodada.
+SCAN_SCRIPT = r"""
+return (function(framePrefix, origin, vp){
+  // origin: posição (px CSS, coordenadas da página top) da viewport deste documento; vp: viewport do top
+  origin = origin || {x: window.scrollX, y: window.scrollY};
+  vp = vp || {x: window.scrollX, y: window.scrollY, w: window.innerWidth, h: window.innerHeight};
+  const SEL = 'input, select, textarea, button, a, label, [role="button"], [data-testid]';
+  const elements = [], frames = [], crossOrigin = [];
   function cssEsc(s){return (window.CSS && CSS.escape)? CSS.escape(s): String(s).replace(/([#.;:[\]()>+~*^$|=])/g,'\\$1');}
+  function nthPath(e){
+    let path=[];
+    let depth=0;
+    while(e && e.nodeType===1 && depth<5){
+      const id=e.getAttribute('id');
+      if (id){ path.unshift('#'+cssEsc(id)); break; }
+      const t=e.tagName.toLowerCase();
+      let i=1, sib=e;
+      while((sib=sib.previousElementSibling)!=null){ if (sib.tagName.toLowerCase()===t) i++; }
+      path.unshift(`${t}:nth-of-type(${i})`);
+      e=e.parentElement; depth++;
+    }
+    return path.join(' > ');
+  }
   function getCandidates(el){
     const tag = el.tagName.toLowerCase();
     let c = [];
@@ -84,52 +94,288 @@ return (function(){
       const parts = cls.split(/\s+/).map(x=>'.'+cssEsc(x)).join('');
       c.push(tag+parts);
     }
-    function nthPath(e){
-      let path=[];
-      let depth=0;
-      while(e && e.nodeType===1 && depth<5){
-        const id=e.getAttribute('id');
-        if (id){ path.unshift('#'+cssEsc(id)); break; }
-        const t=e.tagName.toLowerCase();
-        let i=1, sib=e;
-        while((sib=sib.previousElementSibling)!=null){ if (sib.tagName.toLowerCase()===t) i++; }
-        path.unshift(`${t}:nth-of-type(${i})`);
-        e=e.parentElement; depth++;
-      }
-      return path.join(' > ');
-    }
     c.push(nthPath(el));
     // dedup
     return Array.from(new Set(c.filter(Boolean)));
   }
-  function isUnique(sel){
-    try { return document.querySelectorAll(sel).length===1; } catch(e){ return false; }
+  function isUnique(root, sel){
+    try { return root.querySelectorAll(sel).length===1; } catch(e){ return false; }
+  }
+  function bestSelector(el, root){
+    const cands = getCandidates(el);
+    for (const s of cands){ if (isUnique(root, s)) return s; }
+    return cands[cands.length-1];
   }
   function shortText(el){
     const t=(el.textContent||'').trim().replace(/\s+/g,' ');
     return t.length>120? t.slice(0,117)+'…': t;
   }
-  const nodes = Array.from(document.querySelectorAll(
-    'input, select, textarea, button, a, label, [role=\"button\"], [data-testid]'
-  ));
-  return nodes.map(el=>{
+  function isVisible(el, r){
+    if (r.width <= 0 || r.height <= 0) return false;
+    if (el.checkVisibility) return el.checkVisibility({checkOpacity: true, checkVisibilityCSS: true});
+    const cs = (el.ownerDocument.defaultView || window).getComputedStyle(el);
+    return cs.display !== 'none' && cs.visibility !== 'hidden' && cs.opacity !== '0';
+  }
+  function describe(el, root, ctx){
     const tag = el.tagName.toLowerCase();
     const attrs = {};
     ['id','name','type','placeholder','href','class','data-testid','aria-label','role','value']
       .forEach(k=>{ const v=el.getAttribute(k); if(v!=null) attrs[k]=v; });
-    const candidates = getCandidates(el).map(s=>({selector:s, unique:isUnique(s)}));
-    return { tag, text: shortText(el), attributes: attrs, candidates };
-  });
-})();"""
-        elements = driver.execute_script(script)  # Selenium execute_script (API oficial) 
+    const candidates = getCandidates(el).map(s=>({selector:s, unique:isUnique(root, s)}));
+    // geometria em px CSS, coordenadas da página top (mesma base do screenshot de página inteira)
+    const r = el.getBoundingClientRect();
+    const rect = {x: Math.round(ctx.ox + r.left), y: Math.round(ctx.oy + r.top),
+                  w: Math.round(r.width), h: Math.round(r.height)};
+    const inViewport = rect.w > 0 && rect.h > 0 && rect.x < vp.x + vp.w && rect.x + rect.w > vp.x
+                       && rect.y < vp.y + vp.h && rect.y + rect.h > vp.y;
+    return { tag, text: shortText(el), attributes: attrs, candidates,
+             frame_path: ctx.framePath, shadow_path: ctx.shadowPath,
+             rect, visible: isVisible(el, r), in_viewport: inViewport };
+  }
+  // walk: um TreeWalker por root (documento ou shadow root); shadow roots e iframes same-origin
+  // são visitados na mesma passada. hops = iframes (elemento + caminho) desde o contexto atual.
+  function walk(root, ctx, stats){
+    const doc = root.ownerDocument || root;
+    const walker = doc.createTreeWalker(root, NodeFilter.SHOW_ELEMENT);
+    for (let el = walker.nextNode(); el; el = walker.nextNode()){
+      if (el.matches(SEL)){ elements.push(describe(el, root, ctx)); stats.elements++; }
+      if (el.shadowRoot){
+        stats.shadow_roots++;
+        walk(el.shadowRoot, {framePath: ctx.framePath, shadowPath: ctx.shadowPath.concat([bestSelector(el, root)]),
+                             hops: ctx.hops, ox: ctx.ox, oy: ctx.oy}, stats);
+      }
+      if (el.tagName === 'IFRAME' || el.tagName === 'FRAME'){
+        // handles só do documento do contexto atual (elementos de outros documentos são re-localizados pelo caminho)
+        const hop = {element: doc === document ? el : null, shadow_path: ctx.shadowPath, selector: bestSelector(el, root)};
+        const framePath = ctx.framePath.concat([ctx.shadowPath.concat([hop.selector]).join(' >>> ')]);
+        const fr = el.getBoundingClientRect();
+        const childOrigin = {x: ctx.ox + fr.left + el.clientLeft, y: ctx.oy + fr.top + el.clientTop};
+        let child = null;
+        try { child = el.contentDocument; } catch(e) {}
+        if (child && child.documentElement){
+          walkFrame(child, framePath, ctx.hops.concat([hop]), 'same-origin', childOrigin);
+        } else {
+          crossOrigin.push({frame_path: framePath, hops: ctx.hops.concat([hop]), src: el.getAttribute('src') || '',
+                            origin: childOrigin});
+        }
+      }
+    }
+  }
+  function walkFrame(doc, framePath, hops, kind, o){
+    const t0 = performance.now();
+    const stats = {frame_path: framePath, origin: kind, url: String(doc.location && doc.location.href || ''),
+                   elements: 0, shadow_roots: 0, ms: 0, ms_total: 0};
+    frames.push(stats);
+    const nested = frames.length;
+    walk(doc, {framePath: framePath, shadowPath: [], hops: hops, ox: o.x, oy: o.y}, stats);
+    // ms = tempo próprio do frame; ms_total inclui os iframes same-origin aninhados
+    const total = performance.now() - t0;
+    let childMs = 0;
+    for (let i = nested; i < frames.length; i++){
+      if (frames[i].frame_path.length === framePath.length + 1) childMs += frames[i].ms_total;
+    }
+    stats.ms_total = Math.round(total * 100) / 100;
+    stats.ms = Math.round((total - childMs) * 100) / 100;
+  }
+  walkFrame(document, framePrefix, [], framePrefix.length ? 'cross-origin' : 'top', origin);
+  return {elements: elements, frames: frames, cross_origin: crossOrigin, viewport: vp};
+})(arguments[0] || [], arguments[1], arguments[2]);"""
+
+# resolve um iframe pelo caminho shadow + seletor no contexto atual (quando o handle não serve)
+_JS_RESOLVE_FRAME = r"""
+let root = document;
+for (const host of arguments[0]) { const h = root.querySelector(host); root = h && h.shadowRoot; if (!root) return null; }
+return root.querySelector(arguments[1]);
+"""
+
+# limite de aninhamento de iframes cross-origin
+MAX_FRAME_DEPTH = 4
+
+def _switch_into(driver, hop):
+    """Entra no iframe do hop; se o handle não for aceito, re-localiza pelo caminho."""
+    try:
+        if hop.get("element") is None:
+            raise LookupError("sem handle")
+        driver.switch_to.frame(hop["element"])
+    except Exception:
+        el = driver.execute_script(_JS_RESOLVE_FRAME, hop.get("shadow_path") or [], hop["selector"])
+        if el is None:
+            raise
+        driver.switch_to.frame(el)
+
+def _scan_context(driver, frame_prefix, elements, frames, depth=0, origin=None, viewport=None):
+    """Uma chamada execute_script por contexto; iframes cross-origin são visitados em profundidade."""
+    t0 = time.perf_counter()
+    res = driver.execute_script(SCAN_SCRIPT, frame_prefix, origin, viewport) or {}
+    roundtrip_ms = round((time.perf_counter() - t0) * 1000, 2)
+    ctx_frames = res.get("frames") or []
+    if ctx_frames:
+        ctx_frames[0]["roundtrip_ms"] = roundtrip_ms
+    elements.extend(res.get("elements") or [])
+    frames.extend(ctx_frames)
+
+    for xo in res.get("cross_origin") or []:
+        if depth >= MAX_FRAME_DEPTH:
+            frames.append({"frame_path": xo["frame_path"], "origin": "cross-origin", "src": xo.get("src"),
+                           "error": "profundidade máxima"})
+            continue
+        entered = 0
+        try:
+            for hop in xo["hops"]:
+                _switch_into(driver, hop)
+                entered += 1
+            _scan_context(driver, xo["frame_path"], elements, frames, depth + 1,
+                          origin=xo.get("origin"), viewport=res.get("viewport"))
+        except Exception as e:
+            log.debug("Falha ao escanear iframe %s: %s", xo["frame_path"], e)
+            frames.append({"frame_path": xo["frame_path"], "origin": "cross-origin", "src": xo.get("src"),
+                           "error": str(e)})
+        finally:
+            for _ in range(entered):
+                driver.switch_to.parent_frame()
+
+def scan_page(driver):
+    """Inventário completo da página atual → (elements, frames)."""
+    elements, frames = [], []
+    try:
+        _scan_context(driver, [], elements, frames)
+    finally:
+        driver.switch_to.default_content()
+    return elements, frames
+
+def _context_label(el) -> str:
+    """Ex.: 'iframe#chat >> my-widget >>>' (>> = iframe, >>> = shadow root)."""
+    parts = [f"{f} >>" for f in el.get("frame_path") or []] + [f"{s} >>>" for s in el.get("shadow_path") or []]
+    return " ".join(parts)
+
+@click.command(name="scan", help="Faz o inventário de elementos de uma página e gera JSON + HTML em 'scans'.")
+@click.option("--url", prompt=True, help="URL da página a escanear.")
+@click.option("--headed", is_flag=True, help="Executa com interface gráfica (sem headless).")
+@click.option("--profile-cache", is_flag=True, help="Usa um perfil persistente do pool (mantém o cache HTTP entre execuções).")
+@click.option("--profile-cache-mb", default=512, show_default=True, type=click.IntRange(min=16),
+              help="Limite total (MB) dos perfis persistentes; os menos usados são removidos.")
+@click.option("--clear-profile-state", is_flag=True, help="Com --profile-cache, limpa cookies/storage do perfil mas mantém o cache.")
+@click.option("--no-open", is_flag=True, help="Não abre o HTML do scan no navegador ao final (execuções em lote/worker).")
+@click.option("--thumbnails/--no-thumbnails", default=True, show_default=True,
+              help="Recorta miniaturas dos elementos visíveis a partir do screenshot (requer Pillow).")
+@click.option("--max-thumbnails", default=300, show_default=True, type=click.IntRange(min=0),
+              help="Máximo de miniaturas por scan (elementos na viewport primeiro; 0 = sem limite).")
+@click.option("--launch-profile", type=click.Choice(["default", "lean"]), default="default", show_default=True,
+              help="lean: sem serviços em segundo plano, renderers limitados e chrome-headless-shell se houver.")
+@click.option("--page-load", "page_load_strategy", type=click.Choice(["normal", "eager"]), default="normal",
+              show_default=True, help="eager: navegação volta no DOMContentLoaded.")
+@click.option("--browser-logs", is_flag=True, help="Captura logs do console do navegador (sempre ligado no perfil default).")
+@click.option("--visual/--no-visual", default=True, show_default=True,
+              help="Compara o screenshot da página inteira com a baseline da URL (requer NumPy + Pillow).")
+@click.option("--update-baseline", is_flag=True, help="Grava o screenshot deste scan como nova baseline.")
+@click.option("--visual-max-ratio", default=DEFAULT_MAX_RATIO, show_default=True, type=click.FloatRange(0, 1),
+              help="Fração de pixels alterados tolerada antes de falhar (com tamanhos diferentes, o excedente conta como alterado).")
+@click.option("--visual-mask", "visual_masks", multiple=True, callback=parse_masks_option,
+              help="Região dinâmica ignorada (x,y,w,h em px da imagem). Repetível; fica gravada na baseline.")
+@click.option("--profile", "wd_profile", is_flag=True,
+              help="Registra cada comando WebDriver (duração, bytes, call site) e resume no JSON do scan.")
+@click.option("--profile-python", is_flag=True, help="Com --profile, grava também um cProfile (.prof) junto ao scan.")
+def cmd_scan(url: str, headed: bool, profile_cache: bool, profile_cache_mb: int, clear_profile_state: bool, no_open: bool,
+             thumbnails: bool, max_thumbnails: int, launch_profile: str, page_load_strategy: str, browser_logs: bool,
+             visual: bool, update_baseline: bool, visual_max_ratio: float, visual_masks,
+             wd_profile: bool, profile_python: bool):
+    dirs = classicbot_dirs()
+    scans_dir = dirs["scans"]
+    scans_dir.mkdir(parents=True, exist_ok=True)
+
+    driver = None
+    pool = None
+    profile = None
+    profiler = None
+    thumbs = None
+    ts = int(time.time() * 1000)
+    try:
+        if profile_cache:
+            pool = ProfilePool(dirs["profiles"], max_bytes=profile_cache_mb * 1024 * 1024)
+            profile = pool.acquire()
+            if clear_profile_state:
+                pool.clear_state(profile)
+        driver = create_chrome_driver(
+            headless=not headed,
+            user_data_dir=profile.path if profile else None,
+            disk_cache_bytes=pool.slot_cache_bytes if pool else None,
+            launch_profile=launch_profile, page_load_strategy=page_load_strategy,
+            browser_logs=True if browser_logs else None,
+        )
+        if wd_profile:
+            profiler = WebDriverProfiler(
+                driver, python_profile=scans_dir / f"scan_{ts}.prof" if profile_python else None
+            ).attach()
+        set_context(step="carregar")
+        driver.set_page_load_timeout(60)
+        driver.get(url)
+        wait_ready(driver)
+
+        profile_load = None
+        if pool and profile:
+            try:
+                profile_load = pool.record_load(profile, measure_page_load(driver))
+            except Exception as e:
+                log.debug("Falha ao medir carga da página: %s", e)
+
+        # Inventário: uma passada por contexto (top + iframes cross-origin), já com geometria
+        set_context(step="inventario")
+        elements, frames = scan_page(driver)
+
+        # Screenshot da página inteira (um comando CDP) + miniaturas recortadas dele
+        shot = scans_dir / f"scan_{ts}.png"
+        capture = None
+        set_context(step="screenshot")
+        try:
+            capture = capture_full_page(driver, shot)
+        except Exception as e:
+            log.debug("Falha no screenshot: %s", e)
+        if capture and thumbnails:
+            # recortes em segundo plano: JSON/HTML já apontam para os caminhos planejados
+            items = sorted(((i, el) for i, el in enumerate(elements, 1)
+                            if el.get("visible") and el.get("rect", {}).get("w") and el["rect"].get("h")),
+                           key=lambda it: (not it[1].get("in_viewport"), it[0]))
+            try:
+                thumbs = ThumbnailJob(shot, capture, [(i, el["rect"]) for i, el in items],
+                                      scans_dir / f"scan_{ts}_thumbs", limit=max_thumbnails or None)
+            except Exception as e:
+                log.debug("Falha ao iniciar miniaturas: %s", e)
+            for i, path in (thumbs.planned if thumbs else {}).items():
+                elements[i - 1]["thumbnail"] = path.relative_to(scans_dir).as_posix()
         count = len(elements)
+        set_context(step="-")
+
+        # Regressão visual do screenshot contra a baseline da URL
+        visual_result = None
+        if capture and visual and visual_available():
+            try:
+                visual_result = BaselineStore(dirs["baselines"]).check(
+                    shot, url, "scan_full_page", heatmap_path=scans_dir / f"scan_{ts}_diff.png",
+                    masks=visual_masks, max_ratio=visual_max_ratio, update=update_baseline,
+                )
+                click.echo(f"🖼️  Regressão visual: {visual_result.summary()}")
+            except Exception as e:
+                log.warning("Falha na regressão visual: %s", e)
+        browser = launch_info(driver)
+
+        wd_summary = None
+        if profiler:
+            profiler.detach()
+            wd_summary = profiler.summary()
+            click.echo(f"⏱️  WebDriver: {format_summary(wd_summary, top=3)}")
 
         # Salva JSON
         payload = {
             "scanned_at": ts,
             "url": url,
             "screenshot": str(shot.name),
+            "capture": capture,
             "count": count,
+            "profile_cache": profile_load,
+            "browser": browser,
+            "visual_diff": asdict(visual_result) if visual_result else None,
+            "frames": frames,
+            "webdriver_profile": wd_summary,
             "elements": elements
         }
         json_path = scans_dir / f"scan_{ts}.json"
@@ -143,9 +389,16 @@ return (function(){
                 f"<li><code>{c['selector']}</code> — {'único ✅' if c.get('unique') else 'múltiplo ❌'}</li>"
                 for c in el.get("candidates", [])
             )
+            r = el.get("rect") or {}
+            thumb = (f'<a href="{html.escape(el["thumbnail"])}" target="_blank"><img alt="" src="{html.escape(el["thumbnail"])}" '
+                     f'style="max-width:120px;max-height:60px;border:1px solid #e5e7eb"></a>') if el.get("thumbnail") else ""
+            geo = (f"{r.get('x')},{r.get('y')} {r.get('w')}×{r.get('h')}"
+                   f"{'' if el.get('visible') else ' · oculto'}{' · na viewport' if el.get('in_viewport') else ''}") if r else ""
             rows.append(f"""
 <tr>
   <td style="border:1px solid #e5e7eb;padding:8px">{idx}</td>
+  <td style="border:1px solid #e5e7eb;padding:8px">{thumb}<div style="color:#64748b;font-size:12px">{geo}</div></td>
+  <td style="border:1px solid #e5e7eb;padding:8px"><code>{html.escape(_context_label(el))}</code></td>
   <td style="border:1px solid #e5e7eb;padding:8px">{el.get('tag','')}</td>
   <td style="border:1px solid #e5e7eb;padding:8px">{(attrs.get('id','') or '')}</td>
   <td style="border:1px solid #e5e7eb;padding:8px">{(attrs.get('name','') or '')}</td>
@@ -153,18 +406,37 @@ return (function(){
   <td style="border:1px solid #e5e7eb;padding:8px">{el.get('text','')}</td>
   <td style="border:1px solid #e5e7eb;padding:8px"><details><summary>ver seletores</summary><ul>{cand_rows}</ul></details></td>
 </tr>""")
+        frame_rows = "".join(
+            f"<li><code>{html.escape(' >> '.join(f.get('frame_path') or []) or '(top)')}</code> — {f.get('origin')}, "
+            f"{f.get('elements', 0)} elementos, {f.get('shadow_roots', 0)} shadow roots, {f.get('ms', '-')} ms"
+            + (f", round trip {f['roundtrip_ms']} ms" if 'roundtrip_ms' in f else "")
+            + (f" — erro: {html.escape(f['error'])}" if f.get('error') else "") + "</li>"
+            for f in frames
+        )
+        visual_html = ""
+        if visual_result:
+            heat = (f' · <a href="{html.escape(Path(visual_result.heatmap).name)}" target="_blank">mapa de calor</a>'
+                    if visual_result.heatmap else "")
+            color = "#dc2626" if visual_result.status == "fail" else "#334155"
+            visual_html = (f'<p style="margin:0 0 6px;color:{color}">Regressão visual: '
+                           f'{html.escape(visual_result.summary())}{heat}</p>')
         html_doc = f"""<!doctype html>
 <meta charset="utf-8">
 <title>Scan de elementos — classicbot</title>
 <body style="font-family:system-ui,Segoe UI,Arial;margin:24px;max-width:1100px">
   <h1 style="margin:0 0 8px">Scan de elementos</h1>
   <p style="margin:0 0 6px;color:#334155">URL: {url}</p>
-  <p style="margin:0 0 16px;color:#334155">Total de elementos mapeados: <b>{count}</b></p>
+  <p style="margin:0 0 6px;color:#334155">Total de elementos mapeados: <b>{count}</b></p>
+  <p style="margin:0 0 6px;color:#64748b">Navegador: {html.escape(format_launch_info(browser))}</p>
+  {visual_html}
+  <details style="margin:0 0 16px;color:#334155"><summary>Frames: {len(frames)}</summary><ul>{frame_rows}</ul></details>
   <p style="margin:0 0 16px"><img alt="screenshot" src="{shot.name}" style="max-width:100%;border:1px solid #e5e7eb;border-radius:8px"></p>
   <table style="border-collapse:collapse;width:100%">
     <thead>
       <tr style="background:#f1f5f9">
         <th style="text-align:left;padding:8px;border:1px solid #e5e7eb">#</th>
+        <th style="text-align:left;padding:8px;border:1px solid #e5e7eb">elemento</th>
+        <th style="text-align:left;padding:8px;border:1px solid #e5e7eb">contexto</th>
         <th style="text-align:left;padding:8px;border:1px solid #e5e7eb">tag</th>
         <th style="text-align:left;padding:8px;border:1px solid #e5e7eb">id</th>
         <th style="text-align:left;padding:8px;border:1px solid #e5e7eb">name</th>
@@ -183,11 +455,12 @@ return (function(){
         html_path.write_text(html_doc, encoding="utf-8")
 
         # Abre HTML no navegador
-        import webbrowser
-        try:
-            webbrowser.open(html_path.resolve().as_uri())
-        except Exception:
-            pass
+        if not no_open:
+            import webbrowser
+            try:
+                webbrowser.open(html_path.resolve().as_uri())
+            except Exception:
+                pass
 
         click.echo(f"✅ SCAN salvo em:\n  HTML: {html_path}\n  JSON: {json_path}\n  Screenshot: {shot}")
         return 0
@@ -198,5 +471,13 @@ return (function(){
         return 1
 
     finally:
+        if profiler:
+            profiler.detach()
         if driver:
             driver.quit()
+        if pool and profile:
+            pool.release(profile)
+        if thumbs:
+            done = thumbs.wait()
+            if len(done) < len(thumbs.planned):
+                log.warning("Miniaturas: %d de %d geradas.", len(done), len(thumbs.planned))
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Comando: submit
+- Enfileira jobs 'form' / 'scan' na fila durável (Documentos/classicbot/jobs.sqlite3)
+  ou num broker remoto (--broker host:porta)
+- Os parâmetros são os mesmos de cmd_form / cmd_scan (exceto os interativos/perigosos)
+- Os jobs são executados por 'worker' (um ou vários processos/hosts)
+Comando: queue
+- Mostra a contagem de jobs por status
+"""
+
+from __future__ import annotations
+import copy
+import logging
+import click
+
+from utils.job_queue import open_queue, EXCLUDED_PARAMS, HOST_LOCAL_PARAMS
+from commands.cmd_form import cmd_form
+from commands.cmd_scan import cmd_scan
+
+log = logging.getLogger("cmd_submit")
+
+# comandos executáveis por 'worker'
+JOB_COMMANDS = {"form": cmd_form, "scan": cmd_scan}
+
+_queue_options = [
+    click.Option(["--queue", "queue_path"], type=click.Path(dir_okay=False), default=None,
+                 help="Arquivo SQLite da fila (padrão: Documentos/classicbot/jobs.sqlite3)."),
+    click.Option(["--broker"], default=None, help="Usa um broker TCP (host:porta) em vez do arquivo local."),
+]
+
+def _job_params(target: click.Command) -> list[click.Parameter]:
+    """Copia as opções do comando alvo, sem prompts (a URL do scan passa a ser obrigatória)."""
+    params = []
+    for p in target.params:
+        if p.name in EXCLUDED_PARAMS:
+            continue
+        p = copy.copy(p)
+        if getattr(p, "prompt", None):
+            p.prompt = None
+            p.required = p.default is None
+        params.append(p)
+    return params
+
+def sanitize_job_params(target: click.Command, params, remote: bool = False) -> tuple[dict, list[str], list[str]]:
+    """
+    Valida os parâmetros de um job contra a allow-list de _job_params(target).
+    Retorna (params aceitos, proibidos, ignorados): proibidos = EXCLUDED_PARAMS (o job deve ser rejeitado);
+    ignorados = desconhecidos e, com remote=True, HOST_LOCAL_PARAMS.
+    """
+    if not isinstance(params, dict):
+        return {}, ["<params não é um objeto>"], []
+    allowed = {p.name for p in _job_params(target)}
+    if remote:
+        allowed -= HOST_LOCAL_PARAMS
+    clean = {k: v for k, v in params.items() if k in allowed}
+    forbidden = sorted(k for k in params if k in EXCLUDED_PARAMS)
+    ignored = sorted(k for k in params if k not in clean and k not in EXCLUDED_PARAMS)
+    return clean, forbidden, ignored
+
+def _make_submit(kind: str, target: click.Command) -> click.Command:
+    def callback(queue_path, broker, repeat, max_attempts, priority, **params):
+        queue = open_queue(queue_path, broker)
+        ids = [queue.enqueue(kind, params, max_attempts=max_attempts, priority=priority) for _ in range(repeat)]
+        log.info("Enfileirados %d job(s) %s: %s", len(ids), kind, ids)
+        click.echo(f"📥 {len(ids)} job(s) '{kind}' enfileirado(s): {', '.join(map(str, ids))}")
+        return 0
+
+    return click.Command(
+        name=kind,
+        callback=callback,
+        help=f"Enfileira job '{kind}' (mesmas opções de '{target.name}').",
+        params=_job_params(target) + [copy.copy(o) for o in _queue_options] + [
+            click.Option(["--repeat"], type=click.IntRange(min=1), default=1, show_default=True,
+                         help="Quantidade de jobs idênticos."),
+            click.Option(["--max-attempts"], type=click.IntRange(min=1), default=3, show_default=True,
+                         help="Tentativas antes de marcar o job como 'dead'."),
+            click.Option(["--priority"], type=int, default=0, show_default=True, help="Maior primeiro."),
+        ],
+    )
+
+@click.group(name="submit", help="Enfileira execuções de 'form'/'scan' para os workers.")
+def cmd_submit():
+    pass
+
+for _kind, _target in JOB_COMMANDS.items():
+    cmd_submit.add_command(_make_submit(_kind, _target))
+
+@click.command(name="queue", help="Mostra o estado da fila de jobs.")
+@click.option("--queue", "queue_path", type=click.Path(dir_okay=False), default=None,
+              help="Arquivo SQLite da fila (padrão: Documentos/classicbot/jobs.sqlite3).")
+@click.option("--broker", default=None, help="Usa um broker TCP (host:porta) em vez do arquivo local.")
+def cmd_queue_status(queue_path, broker):
+    stats = open_queue(queue_path, broker).stats()
+    click.echo(" | ".join(f"{k}: {v}" for k, v in stats.items()))
+    return 0
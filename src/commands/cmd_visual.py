@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+Comando: visual
+- batch:     compara todos os PNG de uma pasta com os de mesmo nome em outra (baselines), em paralelo
+             (ProcessPoolExecutor); mapas de calor em <pasta>/_diff e resumo em _diff/visual_diff.json;
+             o <baseline>.json (dhash/digest/máscaras) é lido ou gerado para pular imagens idênticas
+- baselines: lista as baselines gravadas por form/scan (Documentos/classicbot/baselines)
+A comparação por execução (form/scan) fica nos próprios comandos (--visual, --update-baseline).
+"""
+
+from __future__ import annotations
+import json
+import logging
+from pathlib import Path
+import click
+
+from utils.paths import classicbot_dirs
+from utils.visual_diff import compare_dir, results_payload, parse_masks_option, DEFAULT_TOLERANCE, DEFAULT_MAX_RATIO
+
+log = logging.getLogger("cmd_visual")
+
+@click.group(name="visual", help="Regressão visual de screenshots contra baselines.")
+def cmd_visual():
+    pass
+
+@cmd_visual.command(name="batch", help="Compara uma pasta de screenshots com uma pasta de baselines (exit 1 se alguma falhar).")
+@click.argument("current_dir", type=click.Path(exists=True, file_okay=False))
+@click.argument("baseline_dir", type=click.Path(exists=True, file_okay=False))
+@click.option("--out-dir", type=click.Path(file_okay=False), default=None, help="Mapas de calor (padrão: CURRENT_DIR/_diff).")
+@click.option("--pattern", default="*.png", show_default=True, help="Glob dos arquivos comparados.")
+@click.option("--tolerance", default=DEFAULT_TOLERANCE, show_default=True, type=click.IntRange(0, 255),
+              help="Diferença por canal (0–255) ignorada em cada pixel.")
+@click.option("--max-ratio", default=DEFAULT_MAX_RATIO, show_default=True, type=click.FloatRange(0, 1),
+              help="Fração de pixels alterados tolerada por imagem (com tamanhos diferentes, o excedente conta como alterado).")
+@click.option("--mask", "masks", multiple=True, callback=parse_masks_option,
+              help="Região ignorada (x,y,w,h). Repetível; soma-se às máscaras do <baseline>.json.")
+@click.option("--workers", default=0, show_default=True, type=click.IntRange(min=0), help="Processos (0 = núcleos da CPU).")
+@click.pass_context
+def visual_batch(ctx, current_dir, baseline_dir, out_dir, pattern, tolerance, max_ratio, masks, workers):
+    out = Path(out_dir) if out_dir else Path(current_dir) / "_diff"
+    results = compare_dir(current_dir, baseline_dir, out, masks=masks, tolerance=tolerance, max_ratio=max_ratio,
+                          workers=workers or None, pattern=pattern)
+    if not results:
+        click.echo("Nenhuma imagem encontrada.")
+        return 0
+    for r in results:
+        icon = {"identical": "✅", "pass": "✅", "fail": "❌"}.get(r.status, "⚠️ ")
+        click.echo(f"{icon} {r.name:40} {r.summary()}")
+    out.mkdir(parents=True, exist_ok=True)
+    summary_path = out / "visual_diff.json"
+    payload = results_payload(results)
+    summary_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    click.echo(f"📊 {payload['counts']} → {summary_path}")
+    if any(r.status in ("fail", "error") for r in results):
+        ctx.exit(1)  # o retorno do comando é ignorado pelo click: CI depende do exit code
+    return 0
+
+@cmd_visual.command(name="baselines", help="Lista as baselines gravadas por form/scan.")
+def visual_baselines():
+    root = classicbot_dirs()["baselines"]
+    metas = sorted(root.glob("*.json"))
+    if not metas:
+        click.echo(f"Nenhuma baseline em {root}")
+        return 0
+    for path in metas:
+        try:
+            meta = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        click.echo(f"{meta.get('updated_at', '?'):19}  {meta.get('step', '?'):16} {meta.get('width')}×{meta.get('height')}"
+                   f"  máscaras={len(meta.get('masks', []))}  {meta.get('url')}")
+    return 0
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+Comando: worker
+- Consome jobs da fila (arquivo SQLite local ou --broker host:porta)
+- Cada job roda cmd_form / cmd_scan com o próprio driver e grava relatórios nas pastas de sempre
+- Heartbeat renova o lease enquanto o job roda; falhas voltam para a fila com backoff
+- Parâmetros do job são filtrados pela allow-list do 'submit': interativos/perigosos (finalizar, ...)
+  rejeitam o job; chrome_binary é ignorado em jobs vindos de um broker remoto
+- Rode quantos workers quiser (processos ou hosts) para escalar a vazão
+Comando: broker
+- Expõe a fila local via TCP para workers em outros hosts
+"""
+
+from __future__ import annotations
+import os
+import time
+import socket
+import logging
+import threading
+import click
+
+from utils.job_queue import JobQueue, QueueBroker, open_queue
+from utils.paths import classicbot_dirs
+from utils.log_setup import set_context
+from commands.cmd_submit import JOB_COMMANDS, sanitize_job_params
+
+log = logging.getLogger("cmd_worker")
+
+def _heartbeat(queue, job_id: int, worker: str, visibility_timeout: float, stop: threading.Event):
+    interval = max(1.0, visibility_timeout / 3)
+    while not stop.wait(interval):
+        try:
+            if not queue.heartbeat(job_id, worker, visibility_timeout):
+                log.warning("Lease do job %s perdido (outro worker pode assumir).", job_id)
+                return
+        except Exception as e:
+            log.warning("Heartbeat falhou para job %s: %s", job_id, e)
+
+@click.command(name="worker", help="Executa jobs enfileirados por 'submit'.")
+@click.option("--queue", "queue_path", type=click.Path(dir_okay=False), default=None,
+              help="Arquivo SQLite da fila (padrão: Documentos/classicbot/jobs.sqlite3).")
+@click.option("--broker", default=None, help="Usa um broker TCP (host:porta) em vez do arquivo local.")
+@click.option("--visibility-timeout", default=300.0, show_default=True, type=float,
+              help="Segundos até um job sem heartbeat voltar para a fila.")
+@click.option("--poll", default=2.0, show_default=True, type=float, help="Intervalo (s) de consulta com a fila vazia.")
+@click.option("--max-jobs", default=0, show_default=True, type=int, help="Encerra após N jobs (0 = sem limite).")
+@click.option("--exit-when-idle", is_flag=True, help="Encerra quando a fila estiver vazia.")
+@click.option("--backoff", default=30.0, show_default=True, type=float, help="Backoff base (s) para retries.")
+@click.pass_context
+def cmd_worker(ctx: click.Context, queue_path, broker, visibility_timeout, poll, max_jobs, exit_when_idle, backoff):
+    queue = open_queue(queue_path, broker)
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    done = 0
+    set_context(worker=worker)
+    click.echo(f"👷 Worker {worker} aguardando jobs…")
+
+    while not max_jobs or done < max_jobs:
+        job = queue.lease(worker, visibility_timeout)
+        if job is None:
+            if exit_when_idle:
+                break
+            time.sleep(poll)
+            continue
+
+        job_id, kind = job["id"], job["kind"]
+        target = JOB_COMMANDS.get(kind)
+        if target is None:
+            queue.fail(job_id, worker, f"tipo de job desconhecido: {kind}", backoff, permanent=True)
+            continue
+        params, forbidden, ignored = sanitize_job_params(target, job["params"], remote=broker is not None)
+        if forbidden:
+            queue.fail(job_id, worker, f"parâmetros não permitidos: {', '.join(forbidden)}", backoff, permanent=True)
+            click.echo(f"⛔ Job {job_id} ({kind}) rejeitado: parâmetros não permitidos ({', '.join(forbidden)})")
+            continue
+        if ignored:
+            log.warning("Job %s: parâmetros ignorados: %s", job_id, ", ".join(ignored))
+
+        log.info("Job %s (%s) tentativa %s/%s", job_id, kind, job["attempts"], job["max_attempts"])
+        stop = threading.Event()
+        hb = threading.Thread(target=_heartbeat, args=(queue, job_id, worker, visibility_timeout, stop), daemon=True)
+        hb.start()
+        started = time.monotonic()
+        try:
+            rc = ctx.invoke(target, **params, no_open=True)
+        except KeyboardInterrupt:
+            stop.set()
+            queue.release(job_id, worker)
+            click.echo(f"⏹️  Worker interrompido; job {job_id} devolvido à fila.")
+            return 130
+        except Exception as e:
+            log.exception("Job %s falhou: %s", job_id, e)
+            rc, error = 1, str(e)
+        else:
+            error = f"exit code {rc}"
+        finally:
+            stop.set()
+            hb.join(timeout=5)
+
+        elapsed = round(time.monotonic() - started, 2)
+        if rc == 0:
+            queue.complete(job_id, worker, {"exit_code": rc, "elapsed_s": elapsed})
+            click.echo(f"✅ Job {job_id} ({kind}) concluído em {elapsed}s")
+        else:
+            queue.fail(job_id, worker, error, backoff)
+            click.echo(f"❌ Job {job_id} ({kind}) falhou: {error}")
+        done += 1
+
+    click.echo(f"Worker {worker} encerrado após {done} job(s).")
+    return 0
+
+@click.command(name="broker", help="Expõe a fila local via TCP para workers em outros hosts.")
+@click.option("--queue", "queue_path", type=click.Path(dir_okay=False), default=None,
+              help="Arquivo SQLite da fila (padrão: Documentos/classicbot/jobs.sqlite3).")
+@click.option("--host", default="127.0.0.1", show_default=True, help="Interface de escuta (sem autenticação!).")
+@click.option("--port", default=8765, show_default=True, type=int)
+def cmd_broker(queue_path, host, port):
+    queue = JobQueue(queue_path or classicbot_dirs()["base"] / "jobs.sqlite3")
+    server = QueueBroker(queue, host, port)
+    click.echo(f"📡 Broker em {host}:{port} → {queue.path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
@@ -1,25 +1,131 @@
+from selenium.common.exceptions import StaleElementReferenceException
+from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+# Verificação em lote: um único round trip para todos os handles em cache.
+_JS_IS_CONNECTED = "return arguments[0].map(function(e){ return !!(e && e.isConnected); });"
+
+# Resolve vários localizadores (id/css) de uma vez; null quando não existe.
+_JS_RESOLVE = """
+return arguments[0].map(function(l){
+  try {
+    return l[0] === 'id' ? document.getElementById(l[1]) : document.querySelector(l[1]);
+  } catch (e) { return null; }
+});
+"""
+
 class BasePage:
+    """
+    Página base com cache de WebElements por localizador.
+    - O cache vale para o documento atual: open() limpa tudo.
+    - StaleElementReferenceException invalida o handle e dispara revalidação em lote (isConnected).
+    - Contadores hits/misses/invalidations ficam disponíveis em cache_stats().
+    """
+
     def __init__(self, driver, timeout=15):
         self.driver = driver
         self.wait = WebDriverWait(driver, timeout)
+        self._elements = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_invalidations = 0
 
     def open(self, url):
+        self.invalidate_cache()
         self.driver.get(url)
 
+    # ---------- cache de elementos ----------
+    def invalidate_cache(self):
+        """Descarta todos os handles (ex.: navegação para outro documento)."""
+        if self._elements:
+            self.cache_invalidations += 1
+        self._elements.clear()
+
+    def validate_cache(self) -> int:
+        """
+        Confere com um único execute_script se os handles ainda estão conectados ao DOM.
+        Se o documento mudou, o Selenium acusa stale e o cache inteiro é descartado.
+        Retorna quantos handles continuam válidos.
+        """
+        if not self._elements:
+            return 0
+        keys = list(self._elements)
+        try:
+            alive = self.driver.execute_script(_JS_IS_CONNECTED, [self._elements[k] for k in keys])
+        except StaleElementReferenceException:
+            self.invalidate_cache()
+            return 0
+        for key, ok in zip(keys, alive or []):
+            if not ok:
+                self._elements.pop(key, None)
+                self.cache_invalidations += 1
+        return len(self._elements)
+
+    def cache_stats(self) -> dict:
+        total = self.cache_hits + self.cache_misses
+        return {
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "invalidations": self.cache_invalidations,
+            "hit_rate": round(self.cache_hits / total, 3) if total else 0.0,
+            "cached": len(self._elements),
+        }
+
+    def resolve(self, *locators):
+        """
+        Pré-carrega vários localizadores (By.ID / By.CSS_SELECTOR) numa única chamada JS.
+        Os que não existirem ainda ficam para o find() normal (com espera).
+        """
+        pending = [loc for loc in locators
+                   if loc not in self._elements and loc[0] in (By.ID, By.CSS_SELECTOR)]
+        if not pending:
+            return
+        found = self.driver.execute_script(_JS_RESOLVE, [[by, sel] for by, sel in pending])
+        for loc, el in zip(pending, found or []):
+            if el is not None:
+                self.cache_misses += 1
+                self._elements[loc] = el
+
+    def _on_element(self, by, selector, action):
+        """Executa action(el); se o handle estiver stale, revalida o cache e tenta de novo uma vez."""
+        try:
+            return action(self.find(by, selector))
+        except StaleElementReferenceException:
+            self._elements.pop((by, selector), None)
+            self.cache_invalidations += 1
+            self.validate_cache()
+            return action(self.find(by, selector))
+
+    # ---------- ações ----------
     def find(self, by, selector):
-        return self.wait.until(EC.presence_of_element_located((by, selector)))
+        key = (by, selector)
+        el = self._elements.get(key)
+        if el is not None:
+            self.cache_hits += 1
+            return el
+        self.cache_misses += 1
+        el = self.wait.until(EC.presence_of_element_located(key))
+        self._elements[key] = el
+        return el
+
+    def wait_clickable(self, by, selector):
+        # predicado próprio: stale precisa propagar para _on_element (não virar timeout)
+        def _clickable(el):
+            return self.wait.until(lambda d: el if el.is_displayed() and el.is_enabled() else False)
+        return self._on_element(by, selector, _clickable)
 
     def click(self, by, selector):
-        el = self.wait.until(EC.element_to_be_clickable((by, selector)))
-        el.click()
-        return el
+        def _click(el):
+            self.wait.until(lambda d: el.is_displayed() and el.is_enabled())
+            el.click()
+            return el
+        return self._on_element(by, selector, _click)
 
     def type(self, by, selector, text, clear=True):
-        el = self.find(by, selector)
-        if clear:
-            el.clear()
-        el.send_keys(text)
-        return el
+        def _type(el):
+            if clear:
+                el.clear()
+            el.send_keys(text)
+            return el
+        return self._on_element(by, selector, _type)
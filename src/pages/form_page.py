@@ -52,14 +52,16 @@ class FormPage(BasePage):
 
     # ---------- STEP 1 ----------
     def fill_step1(self, nome: str, email: str, nascimento: str, telefone: str, renda_value: str | None):
+        # resolve todos os campos do passo 1 em um único round trip (cache do BasePage)
+        self.resolve(self.FIELD_NOME, self.FIELD_EMAIL, self.FIELD_NASC, self.FIELD_TEL, self.FIELD_RENDA)
         self.type(*self.FIELD_NOME, text=nome)
         self.type(*self.FIELD_EMAIL, text=email)
         self.type(*self.FIELD_NASC, text=nascimento)  # ex.: 01/01/1990
         self.type(*self.FIELD_TEL, text=telefone)
 
         if renda_value:
-            renda_el = self.find(*self.FIELD_RENDA)
-            Select(renda_el).select_by_value(renda_value)  # classe Select p/ <select>  :contentReference[oaicite:2]{index=2}
+            # classe Select p/ <select>  :contentReference[oaicite:2]{index=2}
+            self._on_element(*self.FIELD_RENDA, lambda el: Select(el).select_by_value(renda_value))
 
     def advance_from_step1(self):
         self.click(*self.BTN_NEXT_STEP1)
@@ -71,15 +73,15 @@ class FormPage(BasePage):
         WebDriverWait(self.driver, self.wait._timeout).until(EC.invisibility_of_element_located(self.LOADING_STEP2))
         self.wait.until(EC.visibility_of_element_located(self.RESULTS_STEP2))
         self.wait.until(EC.visibility_of_element_located(self.MAIN_NAV))
+        self.validate_cache()
 
     # ---------- STEP 2 ----------
     def set_slider_if_needed(self, value: int | None = None):
         """Ajusta o slider principal se o teste quiser validar ranges (opcional)."""
         if value is None:
             return
-        el = self.find(*self.SLIDER_VIDA)
         # Ajuste via JS + eventos (input/change) para disparar listeners do app.
-        self.driver.execute_script(
+        self._on_element(*self.SLIDER_VIDA, lambda el: self.driver.execute_script(
             """
             const s = arguments[0], v = arguments[1];
             s.value = v;
@@ -87,21 +89,21 @@ class FormPage(BasePage):
             s.dispatchEvent(new Event('change', {bubbles: true}));
             """,
             el, int(value)
-        )
+        ))
 
     def next_from_step2(self):
         self.click(*self.BTN_NEXT)
         self.wait.until(EC.visibility_of_element_located(self.STEP3))
+        self.validate_cache()
 
     # ---------- STEP 3 ----------
     def accept_declarations(self):
         self.click(*self.CHECK_ACEITE)
-        self.wait.until(EC.element_to_be_clickable(self.BTN_FINALIZAR))
+        self.wait_clickable(*self.BTN_FINALIZAR)
 
     def is_ready_to_finalize(self) -> bool:
         try:
-            btn = self.find(*self.BTN_FINALIZAR)
-            return btn.is_enabled()
+            return self._on_element(*self.BTN_FINALIZAR, lambda btn: btn.is_enabled())
         except Exception:
             return False
 
@@ -112,15 +114,14 @@ class FormPage(BasePage):
         - force=True: remove 'disabled' via JS e clica (força).
         """
         try:
-            btn = self.wait.until(EC.element_to_be_clickable(self.BTN_FINALIZAR))
-            btn.click()
+            self.wait_clickable(*self.BTN_FINALIZAR).click()
             return True
         except Exception:
             if not force:
                 raise
 
         # modo forçado: habilita e clica via JS
-        btn = self.find(*self.BTN_FINALIZAR)
-        self.driver.execute_script("arguments[0].removeAttribute('disabled');", btn)
-        self.driver.execute_script("arguments[0].click();", btn)
+        self._on_element(*self.BTN_FINALIZAR, lambda btn: self.driver.execute_script(
+            "arguments[0].removeAttribute('disabled'); arguments[0].click();", btn
+        ))
         return True
@@ -2,16 +2,24 @@
 from dataclasses import dataclass, asdict
 from datetime import datetime
 from pathlib import Path
+import os
 import json
+import time
+import uuid
 import webbrowser
 import html
 
+from utils.retention import write_pointer
+from utils import log_setup
+
 @dataclass
 class Step:
     name: str
     status: str  # "pass" | "fail" | "info"
     message: str = ""
     screenshot: str = ""  # relativo à pasta HTML
+    log_overhead_ms: float = 0.0  # tempo gasto emitindo logs até este passo
+    duration_ms: float = 0.0  # tempo desde o passo anterior (ou do início do relatório)
 
 class HTMLReporter:
     def __init__(self, out_dir: Path, json_out_dir: Path | None = None):
@@ -21,15 +29,26 @@ class HTMLReporter:
         self.json_out_dir.mkdir(parents=True, exist_ok=True)
 
         self.steps: list[Step] = []
-        self.meta = {"started_at": datetime.now().isoformat(timespec="seconds")}
+        self.meta = {"started_at": datetime.now().isoformat(timespec="seconds"), "run_id": uuid.uuid4().hex[:12]}
+        # logs emitidos durante a execução do passo N levam step=N
+        log_setup.set_context(run_id=self.meta["run_id"], step="1")
+        log_setup.overhead.take()
+        self._mark = time.perf_counter()
 
     def add_step(self, name, status="info", message="", screenshot=""):
-        self.steps.append(Step(name, status, message, screenshot))
+        cost = log_setup.overhead.take()
+        now = time.perf_counter()
+        self.steps.append(Step(name, status, message, screenshot, log_overhead_ms=cost["ms"],
+                               duration_ms=round((now - self._mark) * 1000, 1)))
+        self._mark = now
+        log_setup.set_context(step=str(len(self.steps) + 1))
 
     def save(self, open_in_browser: bool = True):
-        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # run_id no nome: vários workers podem terminar no mesmo segundo
+        ts = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{self.meta['run_id']}"
 
         # JSON “humano” + útil pra CI
+        self.meta["log_overhead_ms"] = round(sum(s.log_overhead_ms for s in self.steps), 3)
         json_payload = {"meta": self.meta, "steps": [asdict(s) for s in self.steps]}
         json_file = self.json_out_dir / f"{ts}_report.json"
         json_file.write_text(json.dumps(json_payload, ensure_ascii=False, indent=2), encoding="utf-8")
@@ -53,7 +72,7 @@ class HTMLReporter:
 <title>Relatório de Testes - masterClassic</title>
 <body style="font-family:system-ui,Segoe UI,Arial;margin:24px;max-width:980px">
   <h1 style="margin:0 0 8px">Relatório de Testes</h1>
-  <p style="margin:0 0 16px;color:#475569">Início: {self.meta['started_at']}</p>
+  <p style="margin:0 0 16px;color:#475569">Início: {self.meta['started_at']} · run_id: {self.meta['run_id']} · logging: {self.meta['log_overhead_ms']} ms</p>
   <table style="border-collapse:collapse;width:100%">
     <thead>
       <tr style="background:#f1f5f9">
@@ -72,12 +91,18 @@ class HTMLReporter:
         html_file = self.out_dir / f"{ts}_report.html"
         html_file.write_text(html_doc, encoding="utf-8")
 
-        # conveniência: ponteiros “latest”
+        # conveniência: ponteiros “latest” (atômicos, sem duplicar o relatório)
         try:
-            (self.out_dir / "latest_report.html").write_text(html_doc, encoding="utf-8")
-            (self.json_out_dir / "latest_report.json").write_text(
-                json.dumps(json_payload, ensure_ascii=False, indent=2), encoding="utf-8"
+            latest = self.out_dir / "latest_report.html"
+            tmp = latest.with_suffix(".html.tmp")
+            tmp.write_text(
+                f'<!doctype html><meta charset="utf-8"><meta http-equiv="refresh" content="0; url={html.escape(html_file.name)}">'
+                f'<a href="{html.escape(html_file.name)}">{html.escape(html_file.name)}</a>',
+                encoding="utf-8",
             )
+            os.replace(tmp, latest)
+            write_pointer(self.out_dir, "latest_report", html_file)
+            write_pointer(self.json_out_dir, "latest_report", json_file)
         except Exception:
             pass
 
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 import os
+import time
+import shutil
 from pathlib import Path
 from typing import Optional, List, Dict, Any
 import logging
@@ -14,8 +16,35 @@ try:
 except Exception:
     ChromeDriverManager = None  # type: ignore
 
+try:
+    import psutil  # opcional: RSS por instância (sem ele, /proc no Linux)
+except Exception:
+    psutil = None  # type: ignore
+
 log = logging.getLogger("driver_factory")
 
+LAUNCH_PROFILES = ("default", "lean")
+# binário do chrome-headless-shell (sem UI, sobe mais rápido e usa menos memória)
+HEADLESS_SHELL_ENV = "CLASSICBOT_HEADLESS_SHELL"
+
+# perfil "lean": nada de tráfego/serviços em segundo plano, processos de renderer limitados
+LEAN_ARGS = (
+    "--disable-background-networking",
+    "--disable-extensions",
+    "--disable-component-update",
+    "--disable-sync",
+    "--disable-default-apps",
+    "--disable-breakpad",
+    "--disable-domain-reliability",
+    "--disable-client-side-phishing-detection",
+    "--disable-features=Translate,OptimizationHints,MediaRouter,AutofillServerCommunication",
+    "--metrics-recording-only",
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--mute-audio",
+    "--renderer-process-limit=2",
+)
+
 def _find_chrome_on_windows() -> Optional[str]:
     candidates = [
         r"C:\Program Files\Google\Chrome\Application\chrome.exe",
@@ -28,33 +57,159 @@ def _find_chrome_on_windows() -> Optional[str]:
             return p
     return None
 
-def create_chrome_driver(headless: bool = True, chrome_binary: Optional[str] = None) -> webdriver.Chrome:
+def find_headless_shell() -> Optional[str]:
+    """chrome-headless-shell via CLASSICBOT_HEADLESS_SHELL ou no PATH."""
+    env = os.environ.get(HEADLESS_SHELL_ENV)
+    if env and os.path.exists(env):
+        return env
+    return shutil.which("chrome-headless-shell")
+
+def _descendants_proc(root_pid: int) -> List[int]:
+    """Filhos (recursivo) de root_pid lendo /proc/<pid>/stat (Linux, sem psutil)."""
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            stat = Path(f"/proc/{entry}/stat").read_text()
+        except OSError:
+            continue
+        # campo 4 (ppid) vem depois do nome entre parênteses, que pode conter espaços
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(entry))
+    out, stack = [], [root_pid]
+    while stack:
+        for c in children.get(stack.pop(), []):
+            out.append(c)
+            stack.append(c)
+    return out
+
+def _rss_proc(pid: int) -> int:
+    try:
+        pages = int(Path(f"/proc/{pid}/statm").read_text().split()[1])
+    except (OSError, ValueError, IndexError):
+        return 0
+    return pages * os.sysconf("SC_PAGE_SIZE")
+
+def browser_rss(driver) -> Optional[Dict[str, int]]:
+    """
+    RSS somado do navegador (processos filhos do chromedriver: browser, renderers, GPU, utilitários).
+    Retorna {rss_bytes, processes} ou None se não der para medir (sem psutil fora do Linux, driver remoto).
+    """
+    try:
+        pid = driver.service.process.pid
+    except Exception:
+        return None
+    if psutil is not None:
+        total, count = 0, 0
+        try:
+            procs = psutil.Process(pid).children(recursive=True)
+        except psutil.Error:
+            return None
+        for proc in procs:
+            try:
+                total += proc.memory_info().rss
+                count += 1
+            except psutil.Error:
+                pass
+        return {"rss_bytes": total, "processes": count}
+    if not os.path.isdir("/proc"):
+        return None
+    pids = _descendants_proc(pid)
+    return {"rss_bytes": sum(_rss_proc(p) for p in pids), "processes": len(pids)}
+
+def launch_info(driver) -> Dict[str, Any]:
+    """Dados de inicialização (perfil, binário, tempo) + RSS atual do navegador, para relatórios."""
+    info = dict(getattr(driver, "launch_info", None) or {})
+    rss = browser_rss(driver)
+    if rss:
+        info["rss_mb"] = round(rss["rss_bytes"] / (1024 * 1024), 1)
+        info["processes"] = rss["processes"]
+    return info
+
+def format_launch_info(info: Dict[str, Any]) -> str:
+    return (
+        f"perfil={info.get('launch_profile')}"
+        + (" (headless-shell)" if info.get("headless_shell") else "")
+        + f", page_load={info.get('page_load_strategy')}, início={info.get('launch_ms')} ms"
+        + (f", RSS={info['rss_mb']} MB em {info['processes']} processos" if "rss_mb" in info else "")
+    )
+
+def create_chrome_driver(
+    headless: bool = True,
+    chrome_binary: Optional[str] = None,
+    user_data_dir: Optional[Path] = None,
+    disk_cache_bytes: Optional[int] = None,
+    launch_profile: str = "default",
+    page_load_strategy: str = "normal",
+    browser_logs: Optional[bool] = None,
+) -> webdriver.Chrome:
     """
     Compatibilidade máxima:
     - Usa Selenium Manager por padrão (Service() vazio).
     - Fallback para webdriver-manager se necessário.
     - Mantém detecção do Chrome no Windows.
     - Usa '--headless=new' quando headless=True.
-    - Habilita 'goog:loggingPrefs' para capturar logs do navegador (LogType.BROWSER).
+    - Habilita 'goog:loggingPrefs' para capturar logs do navegador (LogType.BROWSER)
+      (browser_logs; padrão: só no perfil "default").
+    - user_data_dir: perfil persistente (ver utils.profile_pool); sem ele o Chrome usa perfil temporário.
+    - launch_profile="lean": desliga rede/serviços em segundo plano (LEAN_ARGS) e, em headless sem
+      chrome_binary, usa o chrome-headless-shell se houver (find_headless_shell).
+    - page_load_strategy: "normal" ou "eager" (volta no DOMContentLoaded).
+    O driver ganha driver.launch_info (perfil, binário, launch_ms); RSS via launch_info(driver).
     """
+    if launch_profile not in LAUNCH_PROFILES:
+        raise ValueError(f"launch_profile inválido: {launch_profile!r} (use {', '.join(LAUNCH_PROFILES)})")
+    lean = launch_profile == "lean"
+    if browser_logs is None:
+        browser_logs = not lean
+
+    headless_shell = None
+    if lean and headless and not chrome_binary:
+        headless_shell = find_headless_shell()
+        chrome_binary = headless_shell
+
     opts = ChromeOptions()
-    if headless:
+    opts.page_load_strategy = page_load_strategy
+    if headless and not headless_shell:
         opts.add_argument("--headless=new")
     opts.add_argument("--disable-gpu")
     opts.add_argument("--no-sandbox")
     opts.add_argument("--disable-dev-shm-usage")
     opts.add_argument("--window-size=1280,800")
     opts.add_argument("--lang=pt-BR")
+    if lean:
+        for arg in LEAN_ARGS:
+            opts.add_argument(arg)
+    if user_data_dir:
+        opts.add_argument(f"--user-data-dir={Path(user_data_dir).resolve()}")
+        if disk_cache_bytes:
+            opts.add_argument(f"--disk-cache-size={int(disk_cache_bytes)}")
 
     # Habilita logs do navegador (console) — Selenium 4: set_capability('goog:loggingPrefs', {...})
     # Docs: Logging (Selenium) + Chrome Devs (capabilities)
-    opts.set_capability("goog:loggingPrefs", {"browser": "ALL"})  # :contentReference[oaicite:5]{index=5}
+    if browser_logs:
+        opts.set_capability("goog:loggingPrefs", {"browser": "ALL"})  # :contentReference[oaicite:5]{index=5}
 
     if os.name == "nt" and not chrome_binary:
         chrome_binary = _find_chrome_on_windows()
     if chrome_binary:
         opts.binary_location = chrome_binary
 
+    t0 = time.perf_counter()
+    driver = _start_chrome(opts)
+    driver.launch_info = {
+        "launch_profile": launch_profile,
+        "headless_shell": bool(headless_shell),
+        "binary": chrome_binary,
+        "page_load_strategy": page_load_strategy,
+        "browser_logs": browser_logs,
+        "launch_ms": round((time.perf_counter() - t0) * 1000, 1),
+    }
+    log.debug("Navegador iniciado: %s", driver.launch_info)
+    return driver
+
+def _start_chrome(opts: ChromeOptions) -> webdriver.Chrome:
     # 1) Selenium Manager
     try:
         service = ChromeService()
@@ -0,0 +1,323 @@
+# -*- coding: utf-8 -*-
+"""
+Fila de jobs durável (SQLite) para os comandos 'submit' e 'worker'.
+- Leasing com visibility timeout: um job reservado volta para a fila se o worker
+  não renovar (heartbeat) nem concluir dentro do prazo.
+- Retries com backoff exponencial até max_attempts; depois o job fica 'dead'.
+- QueueBroker/RemoteJobQueue: stand-in TCP (JSON por linha) para workers em outros hosts
+  que não enxergam o arquivo SQLite; cada requisição leva um id e o broker não a executa duas vezes.
+"""
+from __future__ import annotations
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import logging
+import threading
+import socketserver
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+log = logging.getLogger("job_queue")
+
+# parâmetros que nunca entram num job: interativos/perigosos em execução desassistida
+# (usado por 'submit' ao gerar as opções e por 'worker' ao validar o job recebido)
+EXCLUDED_PARAMS = frozenset({"finalizar", "forcar_finalizar", "headed", "no_open"})
+# caminhos/executáveis do host que enfileirou: ignorados em jobs vindos de um broker remoto
+HOST_LOCAL_PARAMS = frozenset({"chrome_binary"})
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind          TEXT    NOT NULL,
+    params        TEXT    NOT NULL,
+    status        TEXT    NOT NULL DEFAULT 'queued',  -- queued | leased | done | dead
+    priority      INTEGER NOT NULL DEFAULT 0,
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    max_attempts  INTEGER NOT NULL DEFAULT 3,
+    available_at  REAL    NOT NULL,
+    lease_until   REAL,
+    worker        TEXT,
+    result        TEXT,
+    last_error    TEXT,
+    created_at    REAL    NOT NULL,
+    updated_at    REAL    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs (status, available_at, priority);
+"""
+
+def _row(row: sqlite3.Row | None) -> Optional[Dict[str, Any]]:
+    if row is None:
+        return None
+    job = dict(row)
+    job["params"] = json.loads(job["params"])
+    if job.get("result"):
+        job["result"] = json.loads(job["result"])
+    return job
+
+class JobQueue:
+    """Fila em um arquivo SQLite (WAL). Uma conexão por operação: seguro entre threads e processos."""
+
+    def __init__(self, path: Path, busy_timeout_s: float = 30.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.busy_timeout_s = busy_timeout_s
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(str(self.path), timeout=self.busy_timeout_s, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def enqueue(self, kind: str, params: Dict[str, Any], max_attempts: int = 3, priority: int = 0) -> int:
+        now = time.time()
+        with self._connect() as db:
+            cur = db.execute(
+                "INSERT INTO jobs (kind, params, priority, max_attempts, available_at, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (kind, json.dumps(params, ensure_ascii=False), priority, max_attempts, now, now, now),
+            )
+            return int(cur.lastrowid)
+
+    def lease(self, worker: str, visibility_timeout: float) -> Optional[Dict[str, Any]]:
+        """Reserva o próximo job pronto (ou com lease expirado) para 'worker'."""
+        now = time.time()
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                # leases expirados sem tentativas restantes viram 'dead'
+                db.execute(
+                    "UPDATE jobs SET status='dead', last_error=COALESCE(last_error, 'lease expirado'), updated_at=?"
+                    " WHERE status='leased' AND lease_until < ? AND attempts >= max_attempts",
+                    (now, now),
+                )
+                row = db.execute(
+                    "SELECT id FROM jobs"
+                    " WHERE (status='queued' AND available_at <= ?) OR (status='leased' AND lease_until < ?)"
+                    " ORDER BY priority DESC, id LIMIT 1",
+                    (now, now),
+                ).fetchone()
+                if row is None:
+                    db.execute("COMMIT")
+                    return None
+                db.execute(
+                    "UPDATE jobs SET status='leased', attempts=attempts+1, worker=?, lease_until=?, updated_at=?"
+                    " WHERE id=?",
+                    (worker, now + visibility_timeout, now, row["id"]),
+                )
+                job = db.execute("SELECT * FROM jobs WHERE id=?", (row["id"],)).fetchone()
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        return _row(job)
+
+    def _update_owned(self, job_id: int, worker: str, sql: str, args: tuple) -> bool:
+        with self._connect() as db:
+            cur = db.execute(
+                f"UPDATE jobs SET {sql}, updated_at=? WHERE id=? AND worker=? AND status='leased'",
+                args + (time.time(), job_id, worker),
+            )
+            return cur.rowcount == 1
+
+    def heartbeat(self, job_id: int, worker: str, visibility_timeout: float) -> bool:
+        """Renova o lease; False se o job já não pertence a este worker."""
+        return self._update_owned(job_id, worker, "lease_until=?", (time.time() + visibility_timeout,))
+
+    def complete(self, job_id: int, worker: str, result: Dict[str, Any] | None = None) -> bool:
+        return self._update_owned(
+            job_id, worker, "status='done', lease_until=NULL, result=?", (json.dumps(result or {}),)
+        )
+
+    def fail(self, job_id: int, worker: str, error: str, backoff_s: float = 30.0, permanent: bool = False) -> bool:
+        """
+        Devolve o job à fila com backoff exponencial, ou marca 'dead' se esgotou as tentativas
+        (ou se permanent=True: job inválido, repetir não adianta).
+        """
+        with self._connect() as db:
+            row = db.execute("SELECT attempts, max_attempts FROM jobs WHERE id=?", (job_id,)).fetchone()
+        if row is None:
+            return False
+        if permanent or row["attempts"] >= row["max_attempts"]:
+            return self._update_owned(job_id, worker, "status='dead', lease_until=NULL, last_error=?", (error,))
+        delay = backoff_s * (2 ** max(0, row["attempts"] - 1))
+        return self._update_owned(
+            job_id, worker, "status='queued', lease_until=NULL, available_at=?, last_error=?",
+            (time.time() + delay, error),
+        )
+
+    def release(self, job_id: int, worker: str) -> bool:
+        """Devolve o job sem consumir tentativa (ex.: worker interrompido)."""
+        return self._update_owned(
+            job_id, worker, "status='queued', lease_until=NULL, attempts=MAX(attempts-1, 0), available_at=?",
+            (time.time(),),
+        )
+
+    def stats(self) -> Dict[str, int]:
+        with self._connect() as db:
+            rows = db.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        out = {"queued": 0, "leased": 0, "done": 0, "dead": 0}
+        out.update({r["status"]: r["n"] for r in rows})
+        return out
+
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        with self._connect() as db:
+            return _row(db.execute("SELECT * FROM jobs WHERE id=?", (job_id,)).fetchone())
+
+# -------------------- broker TCP (stand-in) --------------------
+_BROKER_OPS = {"enqueue", "lease", "heartbeat", "complete", "fail", "release", "stats", "get"}
+# respostas guardadas por id de requisição (reenvio do cliente após timeout/queda não reexecuta)
+_DEDUP_SIZE = 4096
+
+class _BrokerHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        queue: JobQueue = self.server.queue  # type: ignore[attr-defined]
+        for line in self.rfile:
+            try:
+                req = json.loads(line)
+                if not isinstance(req, dict):
+                    raise ValueError("requisição deve ser um objeto JSON")
+            except ValueError as e:
+                req = {"op": None, "error": str(e)}
+            rid = req.get("rid")
+            if rid:
+                resp = self.server.run_once(str(rid), lambda: self._run(queue, req))  # type: ignore[attr-defined]
+            else:
+                resp = self._run(queue, req)
+            self.wfile.write((json.dumps(resp, ensure_ascii=False) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+    @staticmethod
+    def _run(queue: JobQueue, req: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            if "error" in req:
+                raise ValueError(req["error"])
+            op = req.get("op")
+            if op not in _BROKER_OPS:
+                raise ValueError(f"operação inválida: {op!r}")
+            return {"ok": True, "result": getattr(queue, op)(**req.get("args", {}))}
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+
+class QueueBroker(socketserver.ThreadingTCPServer):
+    """
+    Expõe uma JobQueue local via TCP (uma requisição JSON por linha).
+    Requisições com "rid" rodam no máximo uma vez: um reenvio recebe a resposta guardada
+    (ou espera a execução em curso), então enqueue/lease repetidos pelo cliente não duplicam.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, queue: JobQueue, host: str = "127.0.0.1", port: int = 8765):
+        self.queue = queue
+        self._dedup_lock = threading.Lock()
+        self._done: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._inflight: Dict[str, threading.Event] = {}
+        super().__init__((host, port), _BrokerHandler)
+
+    def run_once(self, rid: str, fn) -> Dict[str, Any]:
+        with self._dedup_lock:
+            if rid in self._done:
+                return self._done[rid]
+            running = self._inflight.get(rid)
+            if running is None:
+                self._inflight[rid] = threading.Event()
+        if running is not None:
+            running.wait()
+            with self._dedup_lock:
+                return self._done.get(rid) or {"ok": False, "error": "requisição repetida sem resposta"}
+        resp = {"ok": False, "error": "falha interna do broker"}
+        try:
+            resp = fn()
+        finally:
+            with self._dedup_lock:
+                self._done[rid] = resp
+                while len(self._done) > _DEDUP_SIZE:
+                    self._done.popitem(last=False)
+                self._inflight.pop(rid).set()
+        return resp
+
+class RemoteJobQueue:
+    """Cliente do QueueBroker com a mesma interface da JobQueue."""
+
+    def __init__(self, address: str, timeout_s: float = 30.0):
+        host, _, port = address.rpartition(":")
+        self.address = (host or "127.0.0.1", int(port))
+        self.timeout_s = timeout_s
+        self._lock = threading.Lock()
+        self._sock: socket.socket | None = None
+        self._file = None
+
+    def _call(self, op: str, **args):
+        # o mesmo rid no reenvio: se o broker já executou (ex.: timeout de leitura), devolve a mesma resposta
+        payload = (json.dumps({"op": op, "args": args, "rid": uuid.uuid4().hex}) + "\n").encode("utf-8")
+        with self._lock:
+            for attempt in (1, 2):
+                try:
+                    if self._sock is None:
+                        self._sock = socket.create_connection(self.address, timeout=self.timeout_s)
+                        self._file = self._sock.makefile("rwb")
+                    self._file.write(payload)
+                    self._file.flush()
+                    line = self._file.readline()
+                    if not line:
+                        raise ConnectionError("broker fechou a conexão")
+                    break
+                except OSError:
+                    self.close()
+                    if attempt == 2:
+                        raise
+        resp = json.loads(line)
+        if not resp.get("ok"):
+            raise RuntimeError(f"broker: {resp.get('error')}")
+        return resp.get("result")
+
+    def close(self):
+        try:
+            if self._sock:
+                self._sock.close()
+        finally:
+            self._sock = None
+            self._file = None
+
+    def enqueue(self, kind, params, max_attempts=3, priority=0):
+        return self._call("enqueue", kind=kind, params=params, max_attempts=max_attempts, priority=priority)
+
+    def lease(self, worker, visibility_timeout):
+        return self._call("lease", worker=worker, visibility_timeout=visibility_timeout)
+
+    def heartbeat(self, job_id, worker, visibility_timeout):
+        return self._call("heartbeat", job_id=job_id, worker=worker, visibility_timeout=visibility_timeout)
+
+    def complete(self, job_id, worker, result=None):
+        return self._call("complete", job_id=job_id, worker=worker, result=result)
+
+    def fail(self, job_id, worker, error, backoff_s=30.0, permanent=False):
+        return self._call("fail", job_id=job_id, worker=worker, error=error, backoff_s=backoff_s, permanent=permanent)
+
+    def release(self, job_id, worker):
+        return self._call("release", job_id=job_id, worker=worker)
+
+    def stats(self):
+        return self._call("stats")
+
+    def get(self, job_id):
+        return self._call("get", job_id=job_id)
+
+def open_queue(path: Path | None = None, broker: str | None = None):
+    """JobQueue local (arquivo) ou RemoteJobQueue quando 'broker' (host:porta) é informado."""
+    if broker:
+        return RemoteJobQueue(broker)
+    if path is None:
+        from utils.paths import classicbot_dirs
+        path = classicbot_dirs()["base"] / "jobs.sqlite3"
+    return JobQueue(path)
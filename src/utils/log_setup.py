@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+Logging não bloqueante:
+- Emissores só colocam o registro numa fila (QueueHandler); um QueueListener em thread
+  própria grava no console e no arquivo.
+- Arquivo com rotação por tamanho (RotatingFileHandler) ou diária (TimedRotatingFileHandler),
+  em vez de um arquivo novo por execução. O arquivo pode ser compartilhado por vários processos
+  (form e scan ao mesmo tempo): a rotação roda sob um lock entre processos e quem ainda escreve
+  no arquivo antigo reabre o novo no próximo registro.
+- Formato texto ou JSON por linha, com contexto run_id / worker / step (contextvars).
+- Mede o custo de logging no caminho quente (tempo gasto dentro do QueueHandler),
+  consumido por passo pelo HTMLReporter; o acumulado é por thread, então logs das threads
+  de retenção/heartbeat não entram na conta do relatório.
+"""
+from __future__ import annotations
+import os
+import sys
+import time
+import copy
+import json
+import queue
+import atexit
+import logging
+import threading
+import contextvars
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter_ns
+from typing import Optional, Dict
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+
+from utils import pid_lock
+
+run_id_var: contextvars.ContextVar[str] = contextvars.ContextVar("run_id", default="-")
+worker_var: contextvars.ContextVar[str] = contextvars.ContextVar("worker", default="-")
+step_var: contextvars.ContextVar[str] = contextvars.ContextVar("step", default="-")
+
+TEXT_FORMAT = "%(asctime)s | %(levelname)-8s | %(message)s"
+
+_listener: Optional[QueueListener] = None
+_exc_formatter = logging.Formatter()
+
+def set_context(run_id: str | None = None, worker: str | None = None, step: str | None = None) -> None:
+    if run_id is not None:
+        run_id_var.set(run_id)
+    if worker is not None:
+        worker_var.set(worker)
+    if step is not None:
+        step_var.set(step)
+
+class ContextFilter(logging.Filter):
+    """Anexa run_id/worker/step ao registro (roda na thread que emite)."""
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.run_id = run_id_var.get()
+        record.worker = worker_var.get()
+        record.step = step_var.get()
+        return True
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "run_id": getattr(record, "run_id", "-"),
+            "worker": getattr(record, "worker", "-"),
+            "step": getattr(record, "step", "-"),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+class _Overhead(threading.local):
+    """Acumula, por thread, o tempo gasto pelos emissores dentro do QueueHandler."""
+    def __init__(self):
+        self.ns = 0
+        self.count = 0
+
+    def add(self, ns: int) -> None:
+        self.ns += ns
+        self.count += 1
+
+    def take(self) -> Dict[str, float]:
+        """Retorna e zera o acumulado da thread atual desde a última chamada."""
+        out = {"ms": round(self.ns / 1e6, 3), "records": self.count}
+        self.ns = 0
+        self.count = 0
+        return out
+
+overhead = _Overhead()
+
+class _TimedQueueHandler(QueueHandler):
+    def handle(self, record: logging.LogRecord):
+        t0 = perf_counter_ns()
+        try:
+            return super().handle(record)
+        finally:
+            overhead.add(perf_counter_ns() - t0)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # resolve msg % args e o traceback (não atravessam a fila com segurança), mas deixa a
+        # formatação final (texto/JSON) para a thread do listener
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+class _SharedRotationMixin:
+    """Rotação segura com vários processos no mesmo arquivo (roda na thread do listener)."""
+    _retry_at = 0.0
+    ROLLOVER_RETRY_S = 60
+
+    def _reopen_if_rotated(self) -> bool:
+        """Outro processo rotacionou (o nome aponta para outro arquivo): reabre. True se reabriu."""
+        if self.stream is None:
+            return False
+        try:
+            disk = os.stat(self.baseFilename)
+        except FileNotFoundError:
+            disk = None
+        cur = os.fstat(self.stream.fileno())
+        if disk is not None and (disk.st_ino, disk.st_dev) == (cur.st_ino, cur.st_dev):
+            return False
+        self.stream.close()
+        self.stream = self._open()
+        return True
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self._reopen_if_rotated()
+        except OSError:
+            pass
+        super().emit(record)
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        return time.time() >= self._retry_at and super().shouldRollover(record)
+
+    def doRollover(self) -> None:
+        lock = Path(self.baseFilename + ".lock")
+        if not pid_lock.try_lock(lock, 60):
+            return  # outro processo está rotacionando
+        try:
+            if self._reopen_if_rotated():
+                if hasattr(self, "computeRollover"):
+                    self.rolloverAt = self.computeRollover(int(time.time()))
+                return
+            super().doRollover()
+        except OSError as e:
+            # Windows: o arquivo está aberto em outro processo e não pode ser renomeado
+            self._retry_at = time.time() + self.ROLLOVER_RETRY_S
+            if self.stream is None:
+                self.stream = self._open()
+            sys.stderr.write(f"Rotação de log adiada: {e}\n")
+        finally:
+            pid_lock.release(lock)
+
+class SharedRotatingFileHandler(_SharedRotationMixin, RotatingFileHandler):
+    pass
+
+class SharedTimedRotatingFileHandler(_SharedRotationMixin, TimedRotatingFileHandler):
+    pass
+
+def stop_logging() -> None:
+    """Esvazia a fila e para o listener (chamado no atexit)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+atexit.register(stop_logging)
+
+def setup_logging(
+    logs_dir: Path,
+    verbose: bool = False,
+    json_format: bool = False,
+    name: str = "classicbot",
+    max_mb: float = 10,
+    backups: int = 5,
+    daily: bool = False,
+) -> Path:
+    """Configura o logging raiz com QueueHandler → QueueListener (console + arquivo rotativo)."""
+    global _listener
+    logs_dir = Path(logs_dir)
+    logs_dir.mkdir(parents=True, exist_ok=True)
+    log_path = logs_dir / f"{name}.{'jsonl' if json_format else 'log'}"
+
+    if daily:
+        file_handler: logging.Handler = SharedTimedRotatingFileHandler(
+            log_path, when="midnight", backupCount=backups, encoding="utf-8"
+        )
+    else:
+        file_handler = SharedRotatingFileHandler(
+            log_path, maxBytes=int(max_mb * 1024 * 1024), backupCount=backups, encoding="utf-8"
+        )
+    file_handler.setFormatter(JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT))
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    stop_logging()
+    q: queue.SimpleQueue = queue.SimpleQueue()
+    qh = _TimedQueueHandler(q)
+    qh.addFilter(ContextFilter())
+    _listener = QueueListener(q, console, file_handler, respect_handler_level=True)
+    _listener.start()
+
+    root = logging.getLogger()
+    for h in list(root.handlers):
+        root.removeHandler(h)
+    root.addHandler(qh)
+    root.setLevel(logging.DEBUG if verbose else logging.INFO)
+    logging.getLogger("WDM").setLevel(logging.WARNING)
+    return log_path
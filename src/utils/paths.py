@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 """
 Resolve a pasta 'Documentos' do usuário e cria:
-Documentos/classicbot/{logs, report_html, report_json, scans}
+Documentos/classicbot/{logs, report_html, report_json, scans, sessions, profiles, baselines}
 """
 from __future__ import annotations
 import os
@@ -67,11 +67,17 @@ def get_documents_dir() -> Path:
         return p if p else Path.home() / "Documents"
 
 def classicbot_dirs() -> Dict[str, Path]:
-    base = get_documents_dir() / "classicbot"
+    # CLASSICBOT_HOME permite isolar as saídas (ex.: benchmarks, CI)
+    env_home = os.environ.get("CLASSICBOT_HOME")
+    base = Path(env_home) if env_home else get_documents_dir() / "classicbot"
     logs = base / "logs"
     html = base / "report_html"
     jso = base / "report_json"
     scans = base / "scans"
-    for d in (base, logs, html, jso, scans):
+    sessions = base / "sessions"
+    profiles = base / "profiles"
+    baselines = base / "baselines"
+    for d in (base, logs, html, jso, scans, sessions, profiles, baselines):
         d.mkdir(parents=True, exist_ok=True)
-    return {"base": base, "logs": logs, "report_html": html, "report_json": jso, "scans": scans}
+    return {"base": base, "logs": logs, "report_html": html, "report_json": jso, "scans": scans, "sessions": sessions,
+            "profiles": profiles, "baselines": baselines}
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Locks por arquivo com o PID do dono (perfis do Chrome, retenção de artefatos).
+- O lock nasce já com o PID gravado: arquivo temporário + os.link (falha se o lock existe),
+  então nenhum leitor vê um lock vazio de um dono vivo.
+- Lock de processo morto é obsoleto na hora; sem como verificar o PID (Windows sem psutil),
+  vale a idade (stale_s).
+- Sistemas de arquivos sem hard link caem para O_EXCL + escrita; um lock vazio/ilegível mais
+  novo que EMPTY_GRACE_S é tratado como ocupado (janela entre criar e gravar o PID).
+"""
+from __future__ import annotations
+import os
+import time
+import threading
+from pathlib import Path
+from typing import Optional
+
+try:
+    import psutil  # opcional
+except Exception:
+    psutil = None  # type: ignore
+
+EMPTY_GRACE_S = 10
+
+def pid_alive(pid: int) -> Optional[bool]:
+    if psutil is not None:
+        return psutil.pid_exists(pid)
+    if os.name == "nt":
+        return None  # os.kill(pid, 0) encerra o processo no Windows
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def lock_is_stale(lock_path: Path, stale_s: float) -> bool:
+    lock_path = Path(lock_path)
+    try:
+        text = lock_path.read_text(encoding="utf-8").strip()
+        age = time.time() - lock_path.stat().st_mtime
+    except OSError:
+        return True
+    try:
+        pid = int(text)
+    except ValueError:
+        pid = 0
+    if not pid:
+        return age > EMPTY_GRACE_S
+    alive = pid_alive(pid)
+    if alive is None:
+        return age > stale_s
+    return not alive
+
+def _create(lock_path: Path) -> bool:
+    tmp = lock_path.with_name(f"{lock_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(str(os.getpid()), encoding="utf-8")
+    try:
+        os.link(tmp, lock_path)
+        return True
+    except FileExistsError:
+        return False
+    except OSError:  # sem hard link (ex.: FAT, alguns compartilhamentos de rede)
+        try:
+            fd = os.open(str(lock_path), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            fh.write(str(os.getpid()))
+        return True
+    finally:
+        tmp.unlink(missing_ok=True)
+
+def try_lock(lock_path: Path, stale_s: float) -> bool:
+    """Cria o lock com o PID atual; um lock obsoleto é removido e a criação tentada mais uma vez."""
+    lock_path = Path(lock_path)
+    if _create(lock_path):
+        return True
+    if not lock_is_stale(lock_path, stale_s):
+        return False
+    try:
+        lock_path.unlink()
+    except FileNotFoundError:
+        pass
+    except OSError:
+        return False
+    return _create(lock_path)
+
+def release(lock_path: Path) -> None:
+    try:
+        Path(lock_path).unlink()
+    except FileNotFoundError:
+        pass
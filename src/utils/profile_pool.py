@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+Pool de perfis persistentes do Chrome (--user-data-dir) em Documentos/classicbot/profiles.
+- Um perfil por worker concorrente (slot_00, slot_01, ...) com lock por arquivo (evita
+  o "profile in use" do Chrome); o PID nasce gravado no lock (utils/pid_lock), então um
+  acquire concorrente nunca toma um lock recém-criado por obsoleto.
+- O cache HTTP fica entre execuções; o tamanho total é limitado e os perfis menos
+  usados recentemente (LRU) são removidos quando o limite é ultrapassado.
+  Cada slot limita o próprio cache a max_bytes // max_slots (slot_cache_bytes), para que
+  um perfil sozinho não estoure o orçamento do pool.
+- clear_state() apaga cookies/storage/histórico mas mantém os diretórios de cache.
+- Registra tempos de carga cold/warm em load_times.jsonl para medir o ganho.
+"""
+from __future__ import annotations
+import os
+import json
+import time
+import shutil
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+from utils import pid_lock
+
+log = logging.getLogger("profile_pool")
+
+LAST_USED = ".last_used"
+LOAD_HISTORY = "load_times.jsonl"
+# diretórios de cache mantidos por clear_state (relativos ao perfil 'Default')
+CACHE_DIRS = {"Cache", "Code Cache", "GPUCache", "DawnCache", "DawnGraphiteCache", "DawnWebGPUCache"}
+# locks de processos que não conseguimos verificar expiram após esse tempo
+STALE_LOCK_S = 6 * 3600
+
+def _dir_size(path: Path) -> int:
+    total = 0
+    for root, _dirs, files in os.walk(path):
+        for f in files:
+            try:
+                total += os.path.getsize(os.path.join(root, f))
+            except OSError:
+                pass
+    return total
+
+@dataclass
+class ChromeProfile:
+    slot: str
+    path: Path
+    lock_path: Path
+    warm: bool  # True se o perfil já foi usado antes (cache potencialmente quente)
+
+class ProfilePool:
+    def __init__(self, root: Path, max_bytes: int = 512 * 1024 * 1024, max_slots: int = 8):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_bytes)
+        self.max_slots = int(max_slots)
+
+    @property
+    def slot_cache_bytes(self) -> int:
+        """Limite do --disk-cache-size de cada perfil (fatia do orçamento total)."""
+        return max(1, self.max_bytes // max(1, self.max_slots))
+
+    # ---------- locks ----------
+    @staticmethod
+    def _try_lock(lock_path: Path) -> bool:
+        return pid_lock.try_lock(lock_path, STALE_LOCK_S)
+
+    def _slots(self) -> List[Path]:
+        return sorted(p for p in self.root.iterdir() if p.is_dir() and p.name.startswith("slot_"))
+
+    @staticmethod
+    def _last_used(slot: Path) -> float:
+        try:
+            return (slot / LAST_USED).stat().st_mtime
+        except OSError:
+            return 0.0
+
+    # ---------- API ----------
+    def acquire(self) -> ChromeProfile:
+        """Reserva um perfil livre, preferindo o usado mais recentemente (cache mais quente)."""
+        slots = sorted(self._slots(), key=self._last_used, reverse=True)
+        for slot in slots:
+            lock = slot.with_suffix(".lock")
+            if self._try_lock(lock):
+                return ChromeProfile(slot.name, slot, lock, warm=(slot / LAST_USED).exists())
+
+        taken = {s.name for s in slots}
+        for i in range(self.max_slots):
+            name = f"slot_{i:02d}"
+            if name in taken:
+                continue
+            slot = self.root / name
+            lock = slot.with_suffix(".lock")
+            if self._try_lock(lock):
+                slot.mkdir(parents=True, exist_ok=True)
+                return ChromeProfile(name, slot, lock, warm=False)
+        raise RuntimeError(f"Nenhum perfil livre em {self.root} (max_slots={self.max_slots}).")
+
+    def release(self, profile: ChromeProfile) -> None:
+        """Marca o uso (LRU), libera o lock e aplica o limite de tamanho."""
+        try:
+            (profile.path / LAST_USED).write_text(str(time.time()), encoding="utf-8")
+        except OSError:
+            pass
+        pid_lock.release(profile.lock_path)
+        try:
+            self.evict(keep=profile.slot)
+        except Exception as e:
+            log.debug("Falha na evicção de perfis: %s", e)
+
+    def evict(self, keep: Optional[str] = None) -> List[str]:
+        """
+        Remove perfis livres menos usados (LRU) até o total caber em max_bytes.
+        'keep' (o slot recém-liberado) nunca é removido: é o cache mais quente do pool.
+        """
+        sizes = {s: _dir_size(s) for s in self._slots()}
+        total = sum(sizes.values())
+        removed: List[str] = []
+        for slot in sorted(sizes, key=self._last_used):
+            if total <= self.max_bytes:
+                break
+            if slot.name == keep:
+                continue
+            lock = slot.with_suffix(".lock")
+            if not self._try_lock(lock):
+                continue  # em uso por outro worker
+            try:
+                shutil.rmtree(slot, ignore_errors=True)
+                total -= sizes[slot]
+                removed.append(slot.name)
+                log.info("Perfil removido (LRU): %s (%.1f MB)", slot.name, sizes[slot] / 1e6)
+            finally:
+                pid_lock.release(lock)
+        return removed
+
+    @staticmethod
+    def clear_state(profile: ChromeProfile) -> None:
+        """Apaga cookies, storage, histórico etc. do perfil, mantendo o cache HTTP/código."""
+        default = profile.path / "Default"
+        if not default.is_dir():
+            return
+        for item in default.iterdir():
+            if item.name in CACHE_DIRS:
+                continue
+            if item.is_dir():
+                shutil.rmtree(item, ignore_errors=True)
+            else:
+                try:
+                    item.unlink()
+                except OSError:
+                    pass
+
+    # ---------- medição cold × warm ----------
+    def record_load(self, profile: ChromeProfile, timing: Dict[str, Any]) -> Dict[str, Any]:
+        """Grava a medição no histórico e devolve médias cold/warm para o relatório."""
+        entry = dict(timing, slot=profile.slot, state="warm" if profile.warm else "cold", at=time.time())
+        history = self.root / LOAD_HISTORY
+        try:
+            with history.open("a", encoding="utf-8") as fh:
+                fh.write(json.dumps(entry) + "\n")
+        except OSError:
+            pass
+        return dict(entry, summary=self.load_summary())
+
+    def load_summary(self, last: int = 200) -> Dict[str, Any]:
+        history = self.root / LOAD_HISTORY
+        try:
+            lines = history.read_text(encoding="utf-8").splitlines()[-last:]
+        except OSError:
+            return {}
+        acc: Dict[str, List[float]] = {"cold": [], "warm": []}
+        for line in lines:
+            try:
+                e = json.loads(line)
+                acc[e["state"]].append(float(e["load_ms"]))
+            except Exception:
+                continue
+        return {
+            f"{state}_avg_ms": round(sum(v) / len(v), 1) if v else None
+            for state, v in acc.items()
+        } | {f"{state}_runs": len(v) for state, v in acc.items()}
+
+_JS_LOAD_TIMING = """
+var nav = performance.getEntriesByType('navigation')[0];
+var res = performance.getEntriesByType('resource');
+var transfer = nav ? nav.transferSize : 0, cached = 0;
+res.forEach(function(r){
+  transfer += r.transferSize || 0;
+  if (r.transferSize === 0 && r.decodedBodySize > 0) cached++;
+});
+return {
+  load_ms: nav ? Math.round(nav.duration || (nav.loadEventEnd - nav.startTime)) : null,
+  transfer_bytes: transfer,
+  resources: res.length,
+  cached_resources: cached
+};
+"""
+
+def measure_page_load(driver) -> Dict[str, Any]:
+    """Navigation/Resource Timing do documento atual (duração, bytes trafegados, recursos do cache)."""
+    return driver.execute_script(_JS_LOAD_TIMING) or {}
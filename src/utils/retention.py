@@ -0,0 +1,360 @@
+# -*- coding: utf-8 -*-
+"""
+Retenção e compactação dos artefatos em Documentos/classicbot/.
+- Políticas por tipo (idade, quantidade, tamanho total) — padrões em DEFAULT_POLICIES,
+  sobrescrevíveis em Documentos/classicbot/retention.json
+- Artefatos fora da política vão para archive/<tipo>/<AAAA-MM-DD>.zip (um zip por dia)
+- Índice SQLite (archive/index.sqlite3) para buscar e reabrir o que foi arquivado
+- Escrita do zip é atômica (cópia temporária + os.replace); originais só são
+  apagados depois do índice gravado — uma execução interrompida é retomada na próxima
+- Screenshots referenciados por um relatório HTML são arquivados junto com ele; a política
+  "screenshots" só vale para imagens que nenhum relatório restante referencia
+- Ponteiros "latest" atômicos (substituem as cópias latest_report.*)
+"""
+from __future__ import annotations
+import os
+import re
+import atexit
+import json
+import time
+import shutil
+import sqlite3
+import logging
+import zipfile
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Any
+
+from utils import pid_lock
+
+log = logging.getLogger("retention")
+
+# max_age_days / max_count / max_mb: None = sem limite
+DEFAULT_POLICIES: Dict[str, Dict[str, Any]] = {
+    "logs":        {"max_age_days": 14, "max_count": 50,  "max_mb": 200},
+    "report_html": {"max_age_days": 30, "max_count": 200, "max_mb": None},
+    "report_json": {"max_age_days": 30, "max_count": 200, "max_mb": None},
+    "screenshots": {"max_age_days": 30, "max_count": 600, "max_mb": 500},
+    "scans":       {"max_age_days": 30, "max_count": 100, "max_mb": 500},
+}
+
+# formatos já comprimidos: guardados sem deflate
+_STORED_SUFFIXES = {".png", ".jpg", ".jpeg", ".gz", ".zip", ".webp"}
+# artefatos recentes demais podem estar em escrita
+_MIN_AGE_S = 120
+LOCK_STALE_S = 3600
+# espera máxima pela retenção em segundo plano na saída do processo
+EXIT_WAIT_S = 10
+
+@dataclass
+class Artifact:
+    """Unidade de retenção: um arquivo ou um grupo (ex.: scan_<ts>.{json,html,png})."""
+    kind: str
+    key: str
+    paths: List[Path] = field(default_factory=list)
+    mtime: float = 0.0
+    size: int = 0
+
+def _kind_roots(dirs: Dict[str, Path]) -> Dict[str, Path]:
+    return {
+        "logs": dirs["logs"],
+        "report_html": dirs["report_html"],
+        "report_json": dirs["report_json"],
+        "screenshots": dirs["report_html"] / "screenshots",
+        "scans": dirs["scans"],
+    }
+
+_SCAN_KEY = re.compile(r"^(scan_\d+)")
+# AAAAmmdd_HHMMSS_<run_id>_report.* (relatórios antigos não têm o run_id)
+_REPORT_NAME = re.compile(r"^\d{8}_\d{6}(_[0-9a-f]+)?_report\.(html|json)$")
+# profile_<run_id>.prof (--profile do form) fica em report_json ao lado dos relatórios
+_PROFILE_NAME = re.compile(r"^profile_[0-9A-Za-z_-]+\.prof$")
+# links dos passos no relatório HTML (ver reporters/html_reporter.py)
+_SHOT_HREF = re.compile(r'href="screenshots[/\\]([^"/\\]+\.png)"')
+# arquivo de log ainda sem sufixo de rotação (.log.1, .log.2025-01-01): pode estar aberto
+_ACTIVE_LOG = re.compile(r"\.(log|jsonl)$")
+_ACTIVE_LOG_AGE_S = 86400
+
+def _group_key(kind: str, p: Path) -> Optional[str]:
+    name = p.name
+    if name.startswith("latest") or name.endswith((".tmp", ".lock")):
+        return None
+    if kind == "logs":
+        return name if (".log" in name or ".jsonl" in name) else None
+    if kind in ("report_html", "report_json"):
+        if not p.is_file():
+            return None
+        if _REPORT_NAME.match(name) or (kind == "report_json" and _PROFILE_NAME.match(name)):
+            return name
+        return None
+    if kind == "screenshots":
+        return name if p.suffix.lower() == ".png" else None
+    if kind == "scans":
+        m = _SCAN_KEY.match(name)
+        return m.group(1) if m else None
+    return None
+
+def _tree_size(p: Path) -> int:
+    if p.is_file():
+        return p.stat().st_size
+    return sum(f.stat().st_size for f in p.rglob("*") if f.is_file())
+
+def _report_shots(report: Path) -> List[str]:
+    """Nomes dos screenshots referenciados por um relatório HTML."""
+    try:
+        return _SHOT_HREF.findall(report.read_text(encoding="utf-8", errors="replace"))
+    except OSError:
+        return []
+
+def collect(kind: str, root: Path) -> List[Artifact]:
+    """Agrupa os artefatos de um tipo, do mais novo para o mais velho."""
+    groups: Dict[str, Artifact] = {}
+    if not root.is_dir():
+        return []
+    linked: set = set()
+    if kind == "screenshots":
+        # os referenciados seguem a política do relatório que os usa (ver abaixo)
+        for report in root.parent.glob("*_report.html"):
+            linked.update(_report_shots(report))
+    for p in root.iterdir():
+        key = _group_key(kind, p)
+        if key is None or p.name in linked:
+            continue
+        try:
+            st = p.stat()
+            size = _tree_size(p)
+        except OSError:
+            continue
+        if kind == "logs" and _ACTIVE_LOG.search(p.name) and time.time() - st.st_mtime < _ACTIVE_LOG_AGE_S:
+            continue
+        art = groups.setdefault(key, Artifact(kind, key))
+        art.paths.append(p)
+        art.mtime = max(art.mtime, st.st_mtime)
+        art.size += size
+        if kind == "report_html":
+            for shot in _report_shots(p):
+                sp = root / "screenshots" / shot
+                try:
+                    art.size += sp.stat().st_size
+                except OSError:
+                    continue
+                art.paths.append(sp)
+    return sorted(groups.values(), key=lambda a: a.mtime, reverse=True)
+
+def select_expired(artifacts: List[Artifact], policy: Dict[str, Any], now: float) -> List[Artifact]:
+    """Aplica idade/quantidade/tamanho; o artefato mais novo nunca é arquivado."""
+    max_age = policy.get("max_age_days")
+    max_count = policy.get("max_count")
+    max_bytes = policy["max_mb"] * 1024 * 1024 if policy.get("max_mb") else None
+    expired, total = [], 0
+    for idx, art in enumerate(artifacts):
+        total += art.size
+        if idx == 0 or now - art.mtime < _MIN_AGE_S:
+            continue
+        if (max_age is not None and now - art.mtime > max_age * 86400) \
+                or (max_count is not None and idx >= max_count) \
+                or (max_bytes is not None and total > max_bytes):
+            expired.append(art)
+    return expired
+
+def load_policies(base: Path) -> Dict[str, Dict[str, Any]]:
+    policies = {k: dict(v) for k, v in DEFAULT_POLICIES.items()}
+    cfg = Path(base) / "retention.json"
+    try:
+        for kind, overrides in json.loads(cfg.read_text(encoding="utf-8")).items():
+            if kind in policies and isinstance(overrides, dict):
+                policies[kind].update(overrides)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        log.warning("retention.json inválido (%s); usando padrões.", e)
+    return policies
+
+# -------------------- índice --------------------
+_INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    kind        TEXT NOT NULL,
+    key         TEXT NOT NULL,
+    name        TEXT NOT NULL,
+    day         TEXT NOT NULL,
+    archive     TEXT NOT NULL,
+    arcname     TEXT NOT NULL,
+    size        INTEGER NOT NULL,
+    mtime       REAL NOT NULL,
+    archived_at REAL NOT NULL,
+    PRIMARY KEY (archive, arcname)
+);
+CREATE INDEX IF NOT EXISTS idx_artifacts_name ON artifacts (name);
+CREATE INDEX IF NOT EXISTS idx_artifacts_day ON artifacts (kind, day);
+"""
+
+class ArtifactArchive:
+    def __init__(self, base: Path):
+        self.base = Path(base)
+        self.root = self.base / "archive"
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.root / "index.sqlite3"
+        with self._db() as db:
+            db.executescript(_INDEX_SCHEMA)
+
+    @contextmanager
+    def _db(self):
+        db = sqlite3.connect(str(self.index_path), timeout=30)
+        db.row_factory = sqlite3.Row
+        try:
+            with db:  # commit/rollback
+                yield db
+        finally:
+            db.close()
+
+    def _lock(self) -> Optional[Path]:
+        """Lock com o PID do dono: se o processo morreu no meio (ex.: thread daemon), o próximo assume."""
+        lock = self.root / ".retention.lock"
+        return lock if pid_lock.try_lock(lock, LOCK_STALE_S) else None
+
+    def _add_to_day(self, kind: str, day: str, arts: List[Artifact], kind_root: Path) -> List[tuple]:
+        """Acrescenta os artefatos no zip do dia de forma atômica; retorna linhas para o índice."""
+        target = self.root / kind / f"{day}.zip"
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_suffix(".zip.tmp")
+        tmp.unlink(missing_ok=True)  # sobra de execução interrompida
+        if target.exists():
+            shutil.copy2(target, tmp)
+        rows = []
+        with zipfile.ZipFile(tmp, "a", compression=zipfile.ZIP_DEFLATED) as zf:
+            existing = set(zf.namelist())
+            for art in arts:
+                for p in art.paths:
+                    files = [p] if p.is_file() else sorted(f for f in p.rglob("*") if f.is_file())
+                    for f in files:
+                        arcname = f.relative_to(kind_root).as_posix()
+                        if arcname not in existing:
+                            ctype = zipfile.ZIP_STORED if f.suffix.lower() in _STORED_SUFFIXES else zipfile.ZIP_DEFLATED
+                            zf.write(f, arcname, compress_type=ctype)
+                            existing.add(arcname)
+                        st = f.stat()
+                        rows.append((kind, art.key, f.name, day, str(target.relative_to(self.root)),
+                                     arcname, st.st_size, st.st_mtime, time.time()))
+        os.replace(tmp, target)
+        return rows
+
+    def run(self, dirs: Dict[str, Path], policies: Optional[Dict[str, Dict[str, Any]]] = None,
+            dry_run: bool = False, stop: Optional[threading.Event] = None) -> Dict[str, Any]:
+        """Arquiva os artefatos fora da política. Retorna um resumo por tipo."""
+        policies = policies or load_policies(self.base)
+        lock = None if dry_run else self._lock()
+        if not dry_run and lock is None:
+            log.debug("Retenção já em execução em outro processo.")
+            return {"skipped": True}
+        summary: Dict[str, Any] = {}
+        try:
+            now = time.time()
+            for kind, root in _kind_roots(dirs).items():
+                if stop is not None and stop.is_set():
+                    break
+                expired = select_expired(collect(kind, root), policies.get(kind, {}), now)
+                summary[kind] = {"archived": len(expired), "bytes": sum(a.size for a in expired)}
+                if dry_run or not expired:
+                    continue
+                by_day: Dict[str, List[Artifact]] = {}
+                for art in expired:
+                    by_day.setdefault(datetime.fromtimestamp(art.mtime).strftime("%Y-%m-%d"), []).append(art)
+                for day, arts in sorted(by_day.items()):
+                    if stop is not None and stop.is_set():
+                        break
+                    rows = self._add_to_day(kind, day, arts, root)
+                    with self._db() as db:
+                        db.executemany("INSERT OR REPLACE INTO artifacts VALUES (?,?,?,?,?,?,?,?,?)", rows)
+                    for art in arts:
+                        for p in art.paths:
+                            try:
+                                if p.is_dir():
+                                    shutil.rmtree(p, ignore_errors=True)
+                                else:
+                                    p.unlink(missing_ok=True)
+                            except OSError as e:  # ex.: log ainda aberto no Windows
+                                log.debug("Não foi possível remover %s: %s", p, e)
+            self._drop_legacy_latest(dirs)
+        finally:
+            if lock is not None:
+                pid_lock.release(lock)
+        return summary
+
+    @staticmethod
+    def _drop_legacy_latest(dirs: Dict[str, Path]) -> None:
+        """Remove a cópia antiga latest_report.json (substituída pelo ponteiro latest_report.ptr)."""
+        legacy = dirs["report_json"] / "latest_report.json"
+        if legacy.exists() and (dirs["report_json"] / "latest_report.ptr").exists():
+            legacy.unlink(missing_ok=True)
+
+    def search(self, term: str, kind: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        sql = "SELECT * FROM artifacts WHERE (name LIKE ? OR key LIKE ? OR day LIKE ?)"
+        args: list = [f"%{term}%"] * 3
+        if kind:
+            sql += " AND kind = ?"
+            args.append(kind)
+        sql += " ORDER BY mtime DESC LIMIT ?"
+        args.append(limit)
+        with self._db() as db:
+            return [dict(r) for r in db.execute(sql, args).fetchall()]
+
+    def extract(self, name: str) -> Optional[Path]:
+        """Extrai o grupo do artefato para archive/_open/<tipo>/ e retorna o caminho do arquivo pedido."""
+        with self._db() as db:
+            row = db.execute("SELECT * FROM artifacts WHERE name = ? ORDER BY mtime DESC LIMIT 1", (name,)).fetchone()
+            if row is None:
+                return None
+            group = db.execute("SELECT arcname FROM artifacts WHERE archive = ? AND key = ?",
+                               (row["archive"], row["key"])).fetchall()
+        dest = self.root / "_open" / row["kind"]
+        with zipfile.ZipFile(self.root / row["archive"]) as zf:
+            for g in group:
+                zf.extract(g["arcname"], dest)
+        return dest / row["arcname"]
+
+def run_in_background(dirs: Dict[str, Path], exit_wait_s: float = EXIT_WAIT_S) -> threading.Thread:
+    """
+    Dispara a retenção numa thread daemon (escritas atômicas: pode morrer junto com o processo).
+    Na saída do processo espera até exit_wait_s para a retenção terminar (comandos curtos como submit
+    e queue não a cortam a cada lançamento); passado isso, pede para parar no próximo zip diário.
+    """
+    stop = threading.Event()
+
+    def _run():
+        try:
+            summary = ArtifactArchive(dirs["base"]).run(dirs, stop=stop)
+            archived = sum(v.get("archived", 0) for v in summary.values() if isinstance(v, dict))
+            if archived:
+                log.info("Retenção: %d artefato(s) arquivado(s) %s", archived, summary)
+        except Exception as e:
+            log.warning("Retenção falhou: %s", e)
+
+    def _at_exit():
+        t.join(exit_wait_s)
+        if t.is_alive():
+            stop.set()
+            t.join(exit_wait_s)
+
+    t = threading.Thread(target=_run, name="retention", daemon=True)
+    t.start()
+    atexit.register(_at_exit)
+    return t
+
+# -------------------- ponteiros "latest" --------------------
+def write_pointer(directory: Path, name: str, target: Path) -> Path:
+    """Grava <name>.ptr com o nome do arquivo alvo (tmp + os.replace = atômico)."""
+    ptr = Path(directory) / f"{name}.ptr"
+    tmp = ptr.with_suffix(".ptr.tmp")
+    tmp.write_text(Path(target).name, encoding="utf-8")
+    os.replace(tmp, ptr)
+    return ptr
+
+def resolve_pointer(directory: Path, name: str) -> Optional[Path]:
+    try:
+        target = Path(directory) / (Path(directory) / f"{name}.ptr").read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    return target if target.exists() else None
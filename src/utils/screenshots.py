@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Screenshots para o scan:
+- capture_full_page: página inteira num único comando CDP (Page.captureScreenshot com
+  captureBeyondViewport); sem CDP cai para o screenshot da viewport.
+- ThumbnailJob: recorta miniaturas dos elementos a partir dessa única imagem em segundo plano
+  (pool de threads — o Pillow libera o GIL no encode), sem round trip extra ao navegador.
+  Os caminhos são definidos na largada, então o relatório é escrito enquanto os recortes rodam;
+  no máximo 'limit' miniaturas, priorizando os itens na ordem recebida.
+- cut_thumbnails: o mesmo, esperando terminar.
+"""
+from __future__ import annotations
+import base64
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, List, Tuple, Optional
+
+try:
+    from PIL import Image  # opcional: sem Pillow, não há miniaturas
+except Exception:
+    Image = None  # type: ignore
+
+log = logging.getLogger("screenshots")
+
+# limite de altura suportado pelo compositor do Chrome em uma captura
+MAX_CAPTURE_PX = 16384
+
+def capture_full_page(driver, path: Path) -> Dict[str, Any]:
+    """
+    Salva a página inteira em 'path'. Retorna {full_page, width, height, origin_x, origin_y}
+    com a área capturada em px CSS (coordenadas da página).
+    """
+    path = Path(path)
+    try:
+        metrics = driver.execute_cdp_cmd("Page.getLayoutMetrics", {})
+        size = metrics.get("cssContentSize") or metrics["contentSize"]
+        width = int(size["width"])
+        height = min(int(size["height"]), MAX_CAPTURE_PX)
+        shot = driver.execute_cdp_cmd("Page.captureScreenshot", {
+            "format": "png",
+            "captureBeyondViewport": True,
+            "clip": {"x": 0, "y": 0, "width": width, "height": height, "scale": 1},
+        })
+        path.write_bytes(base64.b64decode(shot["data"]))
+        return {"full_page": True, "width": width, "height": height, "origin_x": 0, "origin_y": 0}
+    except Exception as e:
+        log.debug("Captura de página inteira via CDP indisponível (%s); usando viewport.", e)
+    vp = driver.execute_script(
+        "return {x: window.scrollX, y: window.scrollY, w: window.innerWidth, h: window.innerHeight};"
+    )
+    driver.save_screenshot(str(path))
+    return {"full_page": False, "width": vp["w"], "height": vp["h"], "origin_x": vp["x"], "origin_y": vp["y"]}
+
+def _crop(image, box: Tuple[int, int, int, int], out: Path, max_side: int) -> Optional[Path]:
+    thumb = image.crop(box)
+    thumb.thumbnail((max_side, max_side))
+    thumb.save(out, format="PNG", optimize=False)
+    return out
+
+class ThumbnailJob:
+    """
+    Recorta cada (índice, rect) da imagem capturada numa thread própria. rect em px CSS de página;
+    a escala px da imagem / px CSS vem do tamanho real do PNG (cobre deviceScaleFactor).
+    'planned' ({índice: caminho}) fica pronto no construtor; wait() devolve só os recortes gerados.
+    """
+
+    def __init__(
+        self,
+        shot_path: Path,
+        capture: Dict[str, Any],
+        items: List[Tuple[int, Dict[str, int]]],
+        out_dir: Path,
+        max_side: int = 160,
+        padding: int = 4,
+        workers: int = 4,
+        limit: Optional[int] = None,
+    ):
+        self.planned: Dict[int, Path] = {}
+        self._results: Dict[int, Path] = {}
+        self._thread: Optional[threading.Thread] = None
+        if Image is None or not items:
+            return
+        with Image.open(shot_path) as probe:  # só o cabeçalho: o decode fica para a thread
+            width, height = probe.size
+        scale = width / max(1, capture["width"])
+        ox, oy = capture.get("origin_x", 0), capture.get("origin_y", 0)
+        out_dir = Path(out_dir)
+        boxes: Dict[int, Tuple[int, int, int, int]] = {}
+        for idx, r in items:
+            if limit is not None and len(boxes) >= limit:
+                break
+            left = int((r["x"] - ox - padding) * scale)
+            top = int((r["y"] - oy - padding) * scale)
+            right = int((r["x"] - ox + r["w"] + padding) * scale)
+            bottom = int((r["y"] - oy + r["h"] + padding) * scale)
+            box = (max(0, left), max(0, top), min(width, right), min(height, bottom))
+            if box[2] - box[0] < 2 or box[3] - box[1] < 2:
+                continue  # fora da área capturada
+            boxes[idx] = box
+            self.planned[idx] = out_dir / f"{idx:05d}.png"
+        if not boxes:
+            return
+        out_dir.mkdir(parents=True, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, args=(Path(shot_path), boxes, max_side, workers),
+                                        name="thumbs", daemon=False)
+        self._thread.start()
+
+    def _run(self, shot_path: Path, boxes: Dict[int, Tuple[int, int, int, int]], max_side: int, workers: int):
+        try:
+            image = Image.open(shot_path)
+            image.load()  # decodifica uma vez; os crops em paralelo só leem
+        except Exception as e:
+            log.warning("Miniaturas: falha ao abrir %s: %s", shot_path, e)
+            return
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbs") as pool:
+            jobs = {idx: pool.submit(_crop, image, box, self.planned[idx], max_side) for idx, box in boxes.items()}
+        for idx, fut in jobs.items():
+            try:
+                self._results[idx] = fut.result()
+            except Exception as e:
+                log.debug("Falha no recorte %s: %s", idx, e)
+
+    def wait(self, timeout: Optional[float] = None) -> Dict[int, Path]:
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return dict(self._results)
+
+def cut_thumbnails(
+    shot_path: Path,
+    capture: Dict[str, Any],
+    items: List[Tuple[int, Dict[str, int]]],
+    out_dir: Path,
+    max_side: int = 160,
+    padding: int = 4,
+    workers: int = 4,
+    limit: Optional[int] = None,
+) -> Dict[int, Path]:
+    """Como ThumbnailJob, mas espera os recortes. Retorna {índice: caminho} só para os gerados."""
+    return ThumbnailJob(shot_path, capture, items, out_dir, max_side, padding, workers, limit).wait()
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Snapshot de sessão para warm start do comando 'form'.
+- Salva cookies, localStorage, sessionStorage e a URL final ao atingir um checkpoint
+  (ex.: formulário pronto) em Documentos/classicbot/sessions/session_<host>.json
+- Restaura antes da primeira navegação via CDP (Network.setCookies +
+  Page.addScriptToEvaluateOnNewDocument), indo direto para a URL salva.
+- Sem CDP: abre /robots.txt da mesma origem, injeta cookies/storage e navega.
+"""
+from __future__ import annotations
+import json
+import os
+import time
+import logging
+from pathlib import Path
+from typing import Optional, Dict, Any
+from urllib.parse import urlparse
+
+log = logging.getLogger("session_store")
+
+SNAPSHOT_VERSION = 1
+
+_JS_DUMP_STORAGE = """
+function dump(s){ var o = {}; for (var i = 0; i < s.length; i++){ var k = s.key(i); o[k] = s.getItem(k); } return o; }
+return {local: dump(window.localStorage), session: dump(window.sessionStorage)};
+"""
+
+_JS_LOAD_STORAGE = """
+(function(origin, local, session){
+  if (window.top !== window || location.origin !== origin) return;
+  try {
+    Object.keys(local).forEach(function(k){ localStorage.setItem(k, local[k]); });
+    Object.keys(session).forEach(function(k){ sessionStorage.setItem(k, session[k]); });
+  } catch (e) {}
+})(%s, %s, %s);
+"""
+
+def _origin(url: str) -> str:
+    u = urlparse(url)
+    return f"{u.scheme}://{u.netloc}"
+
+def snapshot_path(sessions_dir: Path, url: str) -> Path:
+    host = urlparse(url).netloc or "local"
+    return Path(sessions_dir) / f"session_{host.replace(':', '_')}.json"
+
+def load_snapshot(path: Path, max_age_s: float) -> Optional[Dict[str, Any]]:
+    """Lê o snapshot; retorna None se não existir, for inválido ou mais velho que max_age_s."""
+    try:
+        snap = json.loads(Path(path).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        log.warning("Snapshot inválido (%s): %s", path, e)
+        return None
+    if snap.get("version") != SNAPSHOT_VERSION:
+        return None
+    if time.time() - float(snap.get("saved_at", 0)) > max_age_s:
+        log.info("Snapshot expirado: %s", path)
+        return None
+    return snap
+
+def _write_atomic(path: Path, payload: Dict[str, Any]) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+def save_snapshot(driver, path: Path, checkpoint: str, warm_runs: int = 0) -> Dict[str, Any]:
+    """Captura o estado da sessão atual do driver e grava no disco."""
+    storage = driver.execute_script(_JS_DUMP_STORAGE) or {}
+    url = driver.current_url
+    snap = {
+        "version": SNAPSHOT_VERSION,
+        "saved_at": time.time(),
+        "checkpoint": checkpoint,
+        "url": url,
+        "origin": _origin(url),
+        "cookies": driver.get_cookies(),
+        "local_storage": storage.get("local") or {},
+        "session_storage": storage.get("session") or {},
+        "warm_runs": warm_runs,
+    }
+    _write_atomic(Path(path), snap)
+    return snap
+
+def bump_warm_runs(path: Path, snap: Dict[str, Any]) -> None:
+    """Incrementa o contador de warm starts (usado para forçar o caminho completo periodicamente)."""
+    snap = dict(snap, warm_runs=int(snap.get("warm_runs", 0)) + 1)
+    try:
+        _write_atomic(Path(path), snap)
+    except Exception as e:
+        log.debug("Falha ao atualizar snapshot: %s", e)
+
+def discard_snapshot(path: Path) -> None:
+    try:
+        Path(path).unlink()
+    except FileNotFoundError:
+        pass
+
+def _cdp_cookie(c: Dict[str, Any], origin: str) -> Dict[str, Any]:
+    out = {"name": c["name"], "value": c["value"], "path": c.get("path", "/")}
+    if c.get("domain"):
+        out["domain"] = c["domain"]
+    else:
+        out["url"] = origin
+    for key in ("secure", "httpOnly"):
+        if key in c:
+            out[key] = bool(c[key])
+    if c.get("sameSite") in ("Strict", "Lax", "None"):
+        out["sameSite"] = c["sameSite"]
+    if c.get("expiry"):
+        out["expires"] = float(c["expiry"])
+    return out
+
+def restore_snapshot(driver, snap: Dict[str, Any]) -> None:
+    """Restaura cookies/storage e navega direto para a URL do snapshot."""
+    origin = snap["origin"]
+    storage_js = _JS_LOAD_STORAGE % (
+        json.dumps(origin), json.dumps(snap.get("local_storage") or {}), json.dumps(snap.get("session_storage") or {})
+    )
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setCookies", {"cookies": [_cdp_cookie(c, origin) for c in snap.get("cookies", [])]})
+        script = driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": storage_js})
+    except Exception as e:
+        log.debug("CDP indisponível para restaurar sessão (%s); usando fallback.", e)
+        driver.get(origin + "/robots.txt")
+        for c in snap.get("cookies", []):
+            try:
+                driver.add_cookie({k: v for k, v in c.items() if k != "sameSite" or v in ("Strict", "Lax", "None")})
+            except Exception as err:
+                log.debug("Cookie ignorado (%s): %s", c.get("name"), err)
+        driver.execute_script(storage_js)
+        driver.get(snap["url"])
+        return
+
+    try:
+        driver.get(snap["url"])
+    finally:
+        try:
+            driver.execute_cdp_cmd("Page.removeScriptToEvaluateOnNewDocument", {"identifier": script["identifier"]})
+        except Exception:
+            pass
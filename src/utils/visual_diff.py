@@ -0,0 +1,339 @@
+# -*- coding: utf-8 -*-
+"""
+Regressão visual de screenshots contra baselines:
+- Pré-checagem barata contra o .json da baseline: dHash (16×16 = 256 bits) + digest dos pixels das
+  regiões não mascaradas. Ambos iguais → "identical" sem decodificar a baseline nem comparar pixels.
+  (só o dHash não basta: faixas finas alteradas, ex. um banner de 10 px, podem manter o mesmo hash)
+- Diff por pixel com NumPy: maior diferença entre canais RGB > tolerance conta como alterado;
+  regiões dinâmicas (máscaras x,y,w,h em px da imagem) são ignoradas; diff_ratio = alterados / comparados.
+  Tamanhos diferentes: compara a área comum e conta o excedente como alterado; max_ratio decide.
+- Mapa de calor (PNG) com os pixels alterados em vermelho sobre a imagem atual esmaecida.
+- BaselineStore: Documentos/classicbot/baselines/<chave>.png + <chave>.json, chave = URL + passo.
+- compare_dir: diretório inteiro contra outro diretório de baselines, em paralelo (ProcessPoolExecutor);
+  usa o <nome>.json ao lado de cada baseline para a pré-checagem (gerado na primeira comparação).
+NumPy e Pillow são opcionais: sem eles, available() é False e as comparações levantam RuntimeError.
+"""
+from __future__ import annotations
+import os
+import re
+import json
+import time
+import shutil
+import hashlib
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+import click
+
+try:
+    import numpy as np  # opcional
+except Exception:
+    np = None  # type: ignore
+
+try:
+    from PIL import Image  # opcional
+except Exception:
+    Image = None  # type: ignore
+
+log = logging.getLogger("visual_diff")
+
+Rect = Tuple[int, int, int, int]  # x, y, w, h (px da imagem)
+
+DEFAULT_TOLERANCE = 16  # diferença máxima por canal (0–255) tolerada por pixel
+DEFAULT_MAX_RATIO = 0.001  # fração de pixels alterados aceita (0,1%)
+HASH_SIZE = 16
+
+@dataclass
+class DiffResult:
+    name: str
+    status: str  # "identical" | "pass" | "fail" | "new-baseline" | "baseline-updated" | "missing-baseline" | "error"
+    diff_ratio: float = 0.0
+    changed_pixels: int = 0
+    compared_pixels: int = 0
+    hash_distance: Optional[int] = None
+    size_mismatch: bool = False
+    heatmap: Optional[str] = None
+    error: str = ""
+    elapsed_ms: float = 0.0
+
+    def summary(self) -> str:
+        if self.status in ("new-baseline", "baseline-updated", "missing-baseline", "error"):
+            return f"{self.status}{': ' + self.error if self.error else ''}"
+        return (f"{self.status}: {self.diff_ratio:.3%} dos pixels alterados ({self.changed_pixels}/{self.compared_pixels})"
+                + (" · tamanho diferente (excedente conta como alterado)" if self.size_mismatch else "")
+                + (f" · hash Δ{self.hash_distance}" if self.hash_distance is not None else "")
+                + f" · {self.elapsed_ms:.0f} ms")
+
+def available() -> bool:
+    return np is not None and Image is not None
+
+def _require():
+    if not available():
+        raise RuntimeError("Regressão visual requer NumPy e Pillow (pip install numpy Pillow).")
+
+def parse_mask(text: str) -> Rect:
+    """'x,y,w,h' → (x, y, w, h)."""
+    parts = [int(float(p)) for p in text.split(",")]
+    if len(parts) != 4 or parts[2] <= 0 or parts[3] <= 0:
+        raise ValueError(f"máscara inválida: {text!r} (use x,y,w,h)")
+    return tuple(parts)  # type: ignore[return-value]
+
+def parse_masks_option(ctx, param, values) -> Tuple[Rect, ...]:
+    """Callback click para opções de máscara repetíveis (x,y,w,h)."""
+    try:
+        return tuple(parse_mask(v) for v in values)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+def _load(path: Path):
+    with Image.open(path) as im:
+        return np.asarray(im.convert("RGB"))
+
+def _mask_array(shape: Tuple[int, int], masks: Sequence[Rect]):
+    """True = pixel ignorado."""
+    ignore = np.zeros(shape, dtype=bool)
+    for x, y, w, h in masks:
+        ignore[max(0, y):max(0, y + h), max(0, x):max(0, x + w)] = True
+    return ignore
+
+def dhash(pixels, ignore=None) -> str:
+    """dHash (gradiente horizontal) de HASH_SIZE² bits, em hex; regiões ignoradas entram pretas."""
+    if ignore is not None and ignore.any():
+        pixels = pixels.copy()
+        pixels[ignore] = 0
+    gray = Image.fromarray(pixels).convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.BILINEAR)
+    g = np.asarray(gray, dtype=np.int16)
+    bits = (g[:, 1:] > g[:, :-1]).flatten()
+    return f"{int(''.join('1' if b else '0' for b in bits), 2):0{HASH_SIZE * HASH_SIZE // 4}x}"
+
+def pixel_digest(pixels, ignore=None) -> str:
+    """sha1 dos pixels com as regiões ignoradas zeradas (independe da compressão do PNG)."""
+    if ignore is not None and ignore.any():
+        pixels = pixels.copy()
+        pixels[ignore] = 0
+    return hashlib.sha1(np.ascontiguousarray(pixels).tobytes()).hexdigest()
+
+def hash_distance(a: str, b: str) -> int:
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+def _write_heatmap(current, changed, ignore, diff, path: Path) -> None:
+    gray = current.mean(axis=2) * 0.35
+    out = np.stack([gray, gray, gray], axis=2)
+    out[ignore] = out[ignore] * 0.5 + np.array([0, 0, 90])
+    intensity = diff[changed].astype(np.float32) / 255.0
+    out[changed] = np.stack([150 + 105 * intensity, 30 * (1 - intensity), 30 * (1 - intensity)], axis=1)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    Image.fromarray(out.clip(0, 255).astype(np.uint8)).save(path, format="PNG")
+
+def compare_images(
+    current_path: Path,
+    baseline_path: Path,
+    heatmap_path: Optional[Path] = None,
+    masks: Sequence[Rect] = (),
+    tolerance: int = DEFAULT_TOLERANCE,
+    max_ratio: float = DEFAULT_MAX_RATIO,
+    baseline_meta: Optional[Dict[str, Any]] = None,
+    hash_skip: bool = True,
+) -> DiffResult:
+    """
+    Compara current × baseline. Com baseline_meta (dhash/digest/tamanho gravados), dhash e digest iguais
+    encerram a comparação sem abrir a baseline. Tamanhos diferentes: compara a área comum e conta o excedente como alterado.
+    """
+    _require()
+    t0 = time.perf_counter()
+    name = Path(current_path).name
+    current = _load(current_path)
+    h, w = current.shape[:2]
+    ignore = _mask_array((h, w), masks)
+    cur_hash = dhash(current, ignore)
+
+    if hash_skip and baseline_meta and baseline_meta.get("dhash") == cur_hash \
+            and (baseline_meta.get("width"), baseline_meta.get("height")) == (w, h) \
+            and baseline_meta.get("digest") == pixel_digest(current, ignore):
+        return DiffResult(name, "identical", compared_pixels=int((~ignore).sum()), hash_distance=0,
+                          elapsed_ms=round((time.perf_counter() - t0) * 1000, 1))
+
+    baseline = _load(baseline_path)
+    bh, bw = baseline.shape[:2]
+    dist = hash_distance(cur_hash, dhash(baseline, _mask_array((bh, bw), masks)))
+    ch, cw = min(h, bh), min(w, bw)
+    size_mismatch = (h, w) != (bh, bw)
+
+    # int16: a subtração de uint8 daria a volta (wrap-around)
+    diff = np.abs(current[:ch, :cw].astype(np.int16) - baseline[:ch, :cw].astype(np.int16)).max(axis=2)
+    changed = np.zeros((h, w), dtype=bool)
+    changed[:ch, :cw] = diff > tolerance
+    if size_mismatch:
+        changed[ch:, :] = True
+        changed[:, cw:] = True
+    changed &= ~ignore
+    baseline_only = bh * bw - ch * cw  # área que só existe na baseline conta como alterada
+    compared = int((~ignore).sum()) + baseline_only
+    n_changed = int(changed.sum()) + baseline_only
+    ratio = n_changed / compared if compared else 0.0
+
+    heatmap = None
+    if heatmap_path and n_changed:
+        full_diff = np.full((h, w), 255, dtype=np.int16)
+        full_diff[:ch, :cw] = diff
+        _write_heatmap(current, changed, ignore, full_diff, Path(heatmap_path))
+        heatmap = str(heatmap_path)
+
+    status = "pass" if ratio <= max_ratio else "fail"
+    if status == "pass" and n_changed == 0:
+        status = "identical"
+    return DiffResult(name, status, diff_ratio=round(ratio, 6), changed_pixels=n_changed, compared_pixels=compared,
+                      hash_distance=dist, size_mismatch=size_mismatch, heatmap=heatmap,
+                      elapsed_ms=round((time.perf_counter() - t0) * 1000, 1))
+
+def image_meta(pixels, masks: Sequence[Rect]) -> Dict[str, Any]:
+    """Campos da pré-checagem (tamanho, máscaras, dhash, digest) de uma baseline já decodificada."""
+    h, w = pixels.shape[:2]
+    ignore = _mask_array((h, w), masks)
+    return {"width": w, "height": h, "masks": sorted(list(m) for m in set(map(tuple, masks))),
+            "dhash": dhash(pixels, ignore), "digest": pixel_digest(pixels, ignore)}
+
+def _write_json(path: Path, data: Dict[str, Any]) -> None:
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+def baseline_key(url: str, step: str) -> str:
+    """Chave legível e estável: host_caminho__passo_<hash curto da URL completa>."""
+    parsed = urlparse(url)
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", f"{parsed.netloc}{parsed.path}").strip("_")[:60] or "pagina"
+    step_slug = re.sub(r"[^A-Za-z0-9]+", "_", step).strip("_")[:30] or "passo"
+    return f"{slug}__{step_slug}_{hashlib.sha1(f'{url}|{step}'.encode('utf-8')).hexdigest()[:8]}"
+
+class BaselineStore:
+    """Baselines por URL + passo: <chave>.png e <chave>.json (url, passo, dhash, tamanho, máscaras fixas)."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def paths(self, url: str, step: str) -> Tuple[Path, Path]:
+        key = baseline_key(url, step)
+        return self.root / f"{key}.png", self.root / f"{key}.json"
+
+    def load_meta(self, url: str, step: str) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(self.paths(url, step)[1].read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def save(self, image_path: Path, url: str, step: str, masks: Sequence[Rect] = ()) -> Dict[str, Any]:
+        """Grava/atualiza a baseline (tmp + os.replace) preservando as máscaras já cadastradas."""
+        _require()
+        png, meta_path = self.paths(url, step)
+        old = self.load_meta(url, step) or {}
+        all_masks = {tuple(m) for m in old.get("masks", [])} | {tuple(m) for m in masks}
+        meta = {"url": url, "step": step, **image_meta(_load(image_path), all_masks),
+                "source": Path(image_path).name, "updated_at": datetime.now().isoformat(timespec="seconds")}
+        tmp = png.with_suffix(".png.tmp")
+        shutil.copyfile(image_path, tmp)
+        os.replace(tmp, png)
+        _write_json(meta_path, meta)
+        return meta
+
+    def add_masks(self, url: str, step: str, masks: Sequence[Rect]) -> Dict[str, Any]:
+        """Cadastra máscaras novas numa baseline existente (recalcula dhash/digest; o PNG fica)."""
+        _require()
+        png, meta_path = self.paths(url, step)
+        meta = self.load_meta(url, step) or {}
+        all_masks = {tuple(m) for m in meta.get("masks", [])} | {tuple(m) for m in masks}
+        meta.update(image_meta(_load(png), all_masks), masks_updated_at=datetime.now().isoformat(timespec="seconds"))
+        _write_json(meta_path, meta)
+        return meta
+
+    def check(
+        self,
+        image_path: Path,
+        url: str,
+        step: str,
+        heatmap_path: Optional[Path] = None,
+        masks: Sequence[Rect] = (),
+        tolerance: int = DEFAULT_TOLERANCE,
+        max_ratio: float = DEFAULT_MAX_RATIO,
+        update: bool = False,
+    ) -> DiffResult:
+        """
+        Compara com a baseline de url+step; sem baseline (ou com update) a imagem vira a baseline.
+        Máscaras novas passadas aqui ficam gravadas na baseline (valem para as próximas execuções).
+        """
+        png, _ = self.paths(url, step)
+        meta = self.load_meta(url, step)
+        if update or meta is None or not png.exists():
+            self.save(image_path, url, step, masks)
+            return DiffResult(Path(image_path).name, "baseline-updated" if update and meta else "new-baseline")
+        if not {tuple(m) for m in masks} <= {tuple(m) for m in meta.get("masks", [])}:
+            meta = self.add_masks(url, step, masks)
+        return compare_images(image_path, png, heatmap_path, [tuple(m) for m in meta["masks"]], tolerance,
+                              max_ratio, baseline_meta=meta)
+
+def _sidecar_meta(baseline: Path, masks: Sequence[Rect]) -> Tuple[Dict[str, Any], List[Rect]]:
+    """
+    Meta da pré-checagem em <baseline>.json (mesmo formato do BaselineStore). Máscaras do .json somam-se às
+    pedidas; .json ausente, mais velho que o PNG ou com outras máscaras é recalculado e regravado.
+    """
+    side = baseline.with_suffix(".json")
+    try:
+        meta = json.loads(side.read_text(encoding="utf-8"))
+        if side.stat().st_mtime < baseline.stat().st_mtime:
+            meta = {k: v for k, v in meta.items() if k not in ("dhash", "digest")}
+    except (OSError, ValueError):
+        meta = {}
+    all_masks = sorted({tuple(m) for m in meta.get("masks", [])} | {tuple(m) for m in masks})
+    if "dhash" not in meta or "digest" not in meta or sorted(tuple(m) for m in meta.get("masks", [])) != all_masks:
+        meta.update(image_meta(_load(baseline), all_masks), source=baseline.name)
+        try:
+            _write_json(side, meta)
+        except OSError as e:  # pasta de baselines só leitura: segue sem gravar
+            log.debug("Não foi possível gravar %s: %s", side, e)
+    return meta, all_masks
+
+def _compare_job(args) -> DiffResult:
+    current, baseline, heatmap, masks, tolerance, max_ratio = args
+    if not baseline.exists():
+        return DiffResult(current.name, "missing-baseline")
+    try:
+        meta, all_masks = _sidecar_meta(baseline, masks)
+        return compare_images(current, baseline, heatmap, all_masks, tolerance, max_ratio, baseline_meta=meta)
+    except Exception as e:
+        return DiffResult(current.name, "error", error=str(e))
+
+def compare_dir(
+    current_dir: Path,
+    baseline_dir: Path,
+    out_dir: Optional[Path] = None,
+    masks: Sequence[Rect] = (),
+    tolerance: int = DEFAULT_TOLERANCE,
+    max_ratio: float = DEFAULT_MAX_RATIO,
+    workers: Optional[int] = None,
+    pattern: str = "*.png",
+) -> List[DiffResult]:
+    """Compara cada imagem de current_dir com a de mesmo nome em baseline_dir, em processos paralelos."""
+    _require()
+    current_dir, baseline_dir = Path(current_dir), Path(baseline_dir)
+    out_dir = Path(out_dir) if out_dir else current_dir / "_diff"
+    jobs = [
+        (p, baseline_dir / p.name, out_dir / f"{p.stem}_diff.png", tuple(masks), tolerance, max_ratio)
+        for p in sorted(current_dir.glob(pattern))
+        if p.is_file() and not p.stem.endswith("_diff")
+    ]
+    if not jobs:
+        return []
+    # decodificar + comparar é CPU puro: processos escalam onde threads esbarram no GIL
+    with ProcessPoolExecutor(max_workers=workers or min(len(jobs), os.cpu_count() or 1)) as pool:
+        return list(pool.map(_compare_job, jobs, chunksize=max(1, len(jobs) // 32)))
+
+def results_payload(results: List[DiffResult]) -> Dict[str, Any]:
+    counts: Dict[str, int] = {}
+    for r in results:
+        counts[r.status] = counts.get(r.status, 0) + 1
+    return {"at": datetime.now().isoformat(timespec="seconds"), "counts": counts,
+            "results": [asdict(r) for r in results]}
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+Profiler de comandos WebDriver (--profile):
+- Envolve driver.command_executor.execute e registra cada comando: nome, duração,
+  bytes de requisição/resposta no fio, passo atual (log_setup.step_var) e a linha de
+  pages/ ou commands/ que originou a chamada (ex.: BasePage.find, FormPage.fill_step1).
+- summary(): top comandos, agregados por passo e por call site, tempo no fio
+  (wire) × tempo ocioso (esperas/Python) desde o attach.
+- Bytes: corpo enviado em RemoteConnection._request e resposta crua do pool HTTP (urllib3),
+  sem reserializar nada; sem o pool keep-alive, a resposta é serializada fora do tempo medido.
+- Opcionalmente roda cProfile no lado Python e grava um .prof.
+"""
+from __future__ import annotations
+import sys
+import json
+import time
+import cProfile
+import logging
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from utils import log_setup
+
+log = logging.getLogger("wd_profiler")
+
+_SRC_DIR = Path(__file__).resolve().parent.parent
+# só linhas do próprio bot contam como call site (não selenium, não utils)
+_CALLSITE_DIRS = tuple(str(_SRC_DIR / d) for d in ("pages", "commands"))
+
+@dataclass
+class CommandRecord:
+    command: str
+    ms: float
+    req_bytes: int
+    resp_bytes: int
+    step: str
+    callsite: str
+    ok: bool
+
+def _callsite() -> str:
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(_CALLSITE_DIRS):
+            name = getattr(frame.f_code, "co_qualname", frame.f_code.co_name)
+            return f"{name} ({Path(filename).name}:{frame.f_lineno})"
+        frame = frame.f_back
+    return "?"
+
+def _json_size(obj) -> int:
+    try:
+        return len(json.dumps(obj, default=str))
+    except Exception:
+        return 0
+
+class WebDriverProfiler:
+    def __init__(self, driver, python_profile: Optional[Path] = None):
+        self.driver = driver
+        self.records: List[CommandRecord] = []
+        self.python_profile = Path(python_profile) if python_profile else None
+        self._lock = threading.Lock()
+        self._original = None
+        self._started = 0.0
+        self._stopped: Optional[float] = None
+        self._cprofile: Optional[cProfile.Profile] = None
+        self._wire = threading.local()  # bytes do comando em curso (req/resp), por thread
+        self._conn = None
+
+    def _hook_wire(self, executor) -> None:
+        """Conta os bytes reais: corpo de _request e response.data do pool keep-alive."""
+        wire = self._wire
+        request = executor._request
+
+        def _request(method, url, body=None):
+            if method in ("POST", "PUT"):  # nos demais o corpo não é enviado
+                wire.req = getattr(wire, "req", 0) + len(body or "")
+            return request(method, url, body=body)
+
+        executor._request = _request
+        conn = getattr(executor, "_conn", None)
+        if conn is None:
+            return
+        conn_request = conn.request
+
+        def pooled_request(*args, **kwargs):
+            response = conn_request(*args, **kwargs)
+            wire.resp = getattr(wire, "resp", 0) + len(response.data or b"")  # já lido (preload_content)
+            wire.measured = True
+            return response
+
+        conn.request = pooled_request
+        self._conn = conn
+
+    def attach(self) -> "WebDriverProfiler":
+        executor = self.driver.command_executor
+        self._original = original = executor.execute
+        self._hook_wire(executor)
+        wire = self._wire
+
+        def execute(command, params):
+            callsite = _callsite()
+            wire.req = wire.resp = 0
+            wire.measured = False
+            t0 = time.perf_counter()
+            ok = False
+            response = None
+            try:
+                response = original(command, params)
+                ok = True
+                return response
+            finally:
+                ms = (time.perf_counter() - t0) * 1000
+                resp_bytes = wire.resp
+                if not wire.measured and isinstance(response, dict):
+                    resp_bytes = _json_size(response.get("value"))  # fora de 'ms'
+                rec = CommandRecord(
+                    command=command,
+                    ms=ms,
+                    req_bytes=wire.req,
+                    resp_bytes=resp_bytes,
+                    step=log_setup.step_var.get(),
+                    callsite=callsite,
+                    ok=ok,
+                )
+                with self._lock:
+                    self.records.append(rec)
+
+        executor.execute = execute
+        self._started = time.perf_counter()
+        if self.python_profile:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        return self
+
+    def detach(self) -> None:
+        """Restaura o executor e grava o .prof (se houver). Pode ser chamado mais de uma vez."""
+        if self._stopped is not None:
+            return
+        self._stopped = time.perf_counter()
+        if self._original is not None:
+            executor = self.driver.command_executor
+            try:
+                executor.execute = self._original
+                executor.__dict__.pop("_request", None)
+                if self._conn is not None:
+                    self._conn.__dict__.pop("request", None)
+            except Exception:
+                pass
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            try:
+                self.python_profile.parent.mkdir(parents=True, exist_ok=True)
+                self._cprofile.dump_stats(str(self.python_profile))
+            except Exception as e:
+                log.warning("Falha ao gravar cProfile: %s", e)
+
+    @staticmethod
+    def _aggregate(records: List[CommandRecord], key) -> Dict[str, Dict[str, Any]]:
+        out: Dict[str, Dict[str, Any]] = {}
+        for r in records:
+            agg = out.setdefault(key(r), {"count": 0, "ms": 0.0, "bytes": 0, "errors": 0})
+            agg["count"] += 1
+            agg["ms"] += r.ms
+            agg["bytes"] += r.req_bytes + r.resp_bytes
+            agg["errors"] += 0 if r.ok else 1
+        for agg in out.values():
+            agg["ms"] = round(agg["ms"], 2)
+        return out
+
+    def summary(self, top: int = 10, step_names: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        with self._lock:
+            records = list(self.records)
+        wall_ms = ((self._stopped or time.perf_counter()) - self._started) * 1000
+        wire_ms = sum(r.ms for r in records)
+        step_names = step_names or {}
+
+        def _top(agg: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+            return [dict(name=k, **v) for k, v in sorted(agg.items(), key=lambda kv: kv[1]["ms"], reverse=True)[:top]]
+
+        return {
+            "commands": len(records),
+            "wall_ms": round(wall_ms, 2),
+            "wire_ms": round(wire_ms, 2),
+            "idle_ms": round(max(0.0, wall_ms - wire_ms), 2),
+            "bytes": sum(r.req_bytes + r.resp_bytes for r in records),
+            "top_commands": _top(self._aggregate(records, lambda r: r.command)),
+            "top_callsites": _top(self._aggregate(records, lambda r: r.callsite)),
+            "steps": {
+                step_names.get(k, k): v
+                for k, v in self._aggregate(records, lambda r: r.step).items()
+            },
+            "python_profile": str(self.python_profile) if self.python_profile else None,
+        }
+
+def format_summary(summary: Dict[str, Any], top: int = 5) -> str:
+    """Resumo curto (uma linha por item) para o passo do relatório / console."""
+    lines = [
+        f"{summary['commands']} comandos · fio {summary['wire_ms']:.0f} ms · ocioso {summary['idle_ms']:.0f} ms "
+        f"· {summary['bytes'] / 1024:.0f} KB"
+    ]
+    lines += [f"cmd {c['name']}: {c['count']}× {c['ms']:.0f} ms" for c in summary["top_commands"][:top]]
+    lines += [f"site {c['name']}: {c['count']}× {c['ms']:.0f} ms" for c in summary["top_callsites"][:top]]
+    return " | ".join(lines)